@@ -7,6 +7,7 @@ from flask import Flask, render_template, url_for
 from decimal import Decimal, ROUND_HALF_UP
 from app.extensions import db, login_manager, migrate
 from app.models.user import User
+from app.services.responses import OrjsonProvider
 
 
 def setup_logging(app):
@@ -56,6 +57,8 @@ def create_app(config=None):
         template_folder=os.path.join(project_root, 'templates'),
         static_folder=os.path.join(project_root, 'static')
     )
+    # orjson for jsonify/get_json/tojson; set before the Jinja env is first built
+    app.json = OrjsonProvider(app)
     
     # Load configuration
     if config is None:
@@ -127,6 +130,14 @@ def create_app(config=None):
     
     # Setup logging
     setup_logging(app)
+
+    # Keep compiled template bytecode on disk so a restarted worker skips recompiling.
+    # Opt-in per config (production only), so test and dev runs never write it.
+    if app.config.get('TEMPLATE_BYTECODE_CACHE') and not app.debug and not app.testing:
+        from jinja2 import FileSystemBytecodeCache
+        jinja_cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+        os.makedirs(jinja_cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
     
     # Add security headers middleware
     @app.after_request
@@ -375,4 +386,4 @@ def initialize_database():
             if 'is_archived' not in device_cols:
                 conn.execute(text("ALTER TABLE device ADD COLUMN is_archived BOOLEAN DEFAULT 0 NOT NULL"))
     except Exception:
-        pass
\ No newline at end of file
+        pass
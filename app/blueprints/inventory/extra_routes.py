@@ -1,15 +1,15 @@
 from __future__ import annotations
 
-from flask import render_template, request, redirect, url_for, flash, Response
+from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required
+from sqlalchemy.orm import joinedload
 from app.services.authz import roles_required
+from app.services.csv_export import csv_field, small_csv_response
 from app.extensions import db
 from app.models.inventory import Product, StockMovement
 from app.services.stock import adjust_stock
 from . import inventory_bp
-from datetime import datetime
-import csv
-from io import StringIO
+from datetime import date
 
 
 @inventory_bp.route('/movements')
@@ -30,13 +30,13 @@ def movements():
 
     if date_from:
         try:
-            df = datetime.fromisoformat(date_from).date()
+            df = date.fromisoformat(date_from)
             query = query.filter(StockMovement.created_at >= df)
         except Exception:
             pass
     if date_to:
         try:
-            dt = datetime.fromisoformat(date_to).date()
+            dt = date.fromisoformat(date_to)
             query = query.filter(StockMovement.created_at <= dt)
         except Exception:
             pass
@@ -56,7 +56,8 @@ def low_stock():
     fmt = request.args.get('format', 'html')
     low_threshold = request.args.get('low', None, type=int)
 
-    products = Product.query.order_by(Product.name).all()
+    # The HTML view shows each product's category; load it in the same query (many-to-one JOIN)
+    products = Product.query.options(joinedload(Product.category)).order_by(Product.name).all()  # type: ignore[arg-type]
     rows = []
     for p in products:
         threshold = low_threshold if low_threshold is not None else p.reorder_threshold
@@ -65,11 +66,11 @@ def low_stock():
         rows.append({'product': p, 'low': low, 'threshold': threshold, 'reorder_qty': reorder_qty})
 
     if fmt == 'csv':
-        si = StringIO()
-        cw = csv.writer(si)
-        cw.writerow(['SKU', 'Name', 'Stock', 'Threshold', 'Reorder To', 'Reorder Qty'])
-        for r in rows:
-            cw.writerow([r['product'].sku or '', r['product'].name, r['product'].stock_on_hand, r['threshold'], r['product'].reorder_to, r['reorder_qty']])
-        return Response(si.getvalue(), mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=low_stock.csv'})
+        def csv_rows():
+            yield 'SKU,Name,Stock,Threshold,Reorder To,Reorder Qty\r\n'
+            for r in rows:
+                p = r['product']
+                yield f"{csv_field(p.sku)},{csv_field(p.name)},{p.stock_on_hand},{r['threshold']},{p.reorder_to},{r['reorder_qty']}\r\n"
+        return small_csv_response(csv_rows(), 'low_stock.csv')
 
     return render_template('inventory/low_stock.html', rows=rows)
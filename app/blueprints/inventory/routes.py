@@ -9,7 +9,7 @@ from app.services.guards import require_inventory_edit_enabled
 from app.services.stock import stock_in, StockError, adjust_stock
 from app.services.financials import safe_decimal
 from sqlalchemy import or_
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import contains_eager, joinedload
 
 from . import inventory_bp
 
@@ -32,7 +32,8 @@ def products():
         app.logger.debug("Inventory search q=%s page=%s per_page=%s", q, page, per_page)
         query = (
             query.outerjoin(Category)
-            .options(joinedload(Product.category))  # type: ignore[arg-type]
+            # Fill Product.category from the join the search already needs instead of a second one
+            .options(contains_eager(Product.category))  # type: ignore[arg-type]
             .filter(
                 or_(
                     Product.name.ilike(pattern),
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from flask import render_template, request, redirect, url_for, flash, Response, jsonify
-import json
+import os
+from flask import abort, current_app, render_template, request, redirect, url_for, flash, Response, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import or_
+from sqlalchemy import lambda_stmt, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 
 from app.extensions import db
 from app.models.customer import Customer
@@ -13,13 +15,25 @@ from app.models.inventory import Product
 from app.models.repair import Device, RepairPartUsed, Technician, DeviceAssignment
 from app.models.repair_payment import RepairPayment
 from app.services.authz import roles_required
-from app.services.codes import generate_customer_code, generate_ticket_number
+from app.services.cache import TTLCache
+from app.services.codes import generate_ticket_number
+from app.services.customers import get_or_create_customer_by_phone
+from app.services.devices import update_device_and_return
 from app.services.financials import safe_decimal, recompute_repair_financials
 from app.services.stock import stock_out, StockError
 from app.services.guards import require_tech_can_view_details
+from app.services.pagination import KeysetPage, keyset_paginate
+from app.services.product_cache import get_part_options
+from app.services.responses import dumps, json_response
+from app.services.write_tracker import invalidate_on_commit
 
 from . import repairs_bp
 
+# Serialized repairs_search_api payloads; dropped whenever a Device or Customer write
+# is committed, from any view
+_SEARCH_CACHE = TTLCache(maxsize=1024, ttl=3)
+invalidate_on_commit((Device, Customer), _SEARCH_CACHE.invalidate)
+
 
 @repairs_bp.route("/")
 @login_required
@@ -30,7 +44,7 @@ def repairs():
     status = request.args.get("status", "")
     date_from = request.args.get("date_from", "")
     date_to = request.args.get("date_to", "")
-    page = request.args.get("page", 1, type=int)
+    after_id = request.args.get("after_id", type=int)
 
     archived = request.args.get("archived", "")
 
@@ -46,6 +60,7 @@ def repairs():
 
         # Multi-field search: ticket number, customer name, device model, brand, device type, issue description
         if q:
+            # ILIKE on the bare columns, so PostgreSQL can serve '%q%' from the trigram indexes
             pattern = f"%{q}%"
             query = query.outerjoin(Customer).filter(
                 or_(
@@ -63,33 +78,34 @@ def repairs():
         # Apply date range filters
         if date_from:
             try:
-                df = datetime.fromisoformat(date_from).date()
+                df = date.fromisoformat(date_from)
                 query = query.filter(Device.received_date >= df)
             except (ValueError, TypeError):
                 pass  # Silently ignore invalid dates
 
         if date_to:
             try:
-                dt = datetime.fromisoformat(date_to).date()
+                dt = date.fromisoformat(date_to)
                 query = query.filter(Device.received_date <= dt)
             except (ValueError, TypeError):
                 pass  # Silently ignore invalid dates
 
-        # Eager load relationships to prevent N+1 queries
-        from sqlalchemy.orm import joinedload
-        query = query.options(
-            joinedload(Device.owner),  # type: ignore[arg-type]
-            joinedload(Device.parts_used_rows).joinedload(RepairPartUsed.product)  # type: ignore[arg-type]
-        )
+        # Eager load the relationships the list template renders to prevent N+1 queries.
+        # When searching, the customer join already exists so hydrate owner from it.
+        if q:
+            query = query.options(contains_eager(Device.owner))  # type: ignore[arg-type]
+        else:
+            query = query.options(selectinload(Device.owner))  # type: ignore[arg-type]
+        query = query.options(selectinload(Device.department))  # type: ignore[arg-type]
 
-        # Paginate results
-        devices_pagination = query.order_by(Device.id.desc()).paginate(page=page, per_page=50, error_out=False)
+        # Keyset pagination on Device.id: seeks past the cursor instead of OFFSET + COUNT(*)
+        devices_pagination = keyset_paginate(query, Device.id, after=after_id, per_page=50)
 
     except Exception as e:
         import logging
         logging.error(f"Error in repairs search: {str(e)}")
         # Return empty results instead of crashing
-        devices_pagination = Device.query.paginate(page=1, per_page=50, error_out=False)
+        devices_pagination = KeysetPage(items=[], per_page=50, has_next=False)
 
     return render_template("repairs/repairs.html", devices=devices_pagination, q=q, status=status, date_from=date_from, date_to=date_to)
 
@@ -103,26 +119,37 @@ def repairs_search_api():
     limit = request.args.get('limit', 10, type=int)
 
     if not q or len(q) < 2:
-        return Response(json.dumps([]), mimetype='application/json')
+        return json_response([])
 
     archived = request.args.get('archived', '') == '1'
 
-    base = Device.query.join(Customer, Device.customer_id == Customer.id)
+    # Autocomplete fires per keystroke; serve repeats of the same query from memory
+    cache_key = (q.lower(), limit, archived, current_user.role)
+    cached = _SEARCH_CACHE.get(cache_key)
+    if cached is not None:
+        return Response(cached, mimetype='application/json')
+
+    # Ticket-like input ("JC-2026-0…") only needs a prefix match
+    ticket_pattern = f"{q}%" if q.upper().startswith("JC-") else f"%{q}%"
+    name_pattern = f"%{q}%"
+
+    # lambda_stmt caches the constructed + compiled statement per shape; only the
+    # bound patterns/limit change between keystrokes.
+    stmt = lambda_stmt(lambda: (
+        select(Device)
+        .join(Customer, Device.customer_id == Customer.id)
+        .options(contains_eager(Device.owner))  # type: ignore[arg-type]
+    ))
     # exclude archived repairs from autocomplete/search by default
     if not archived:
-        base = base.filter(Device.is_archived == False)
-
-    results = (
-        base
-        .filter(
-            (Device.ticket_number.ilike(f"%{q}%")) |
-            (Customer.name.ilike(f"%{q}%")) |
-            (Customer.business_name.ilike(f"%{q}%"))
-        )
-        .order_by(Device.id.desc())
-        .limit(limit)
-        .all()
-    )
+        stmt += lambda s: s.where(Device.is_archived == False)
+    stmt += lambda s: s.where(
+        (Device.ticket_number.ilike(ticket_pattern)) |
+        (Customer.name.ilike(name_pattern)) |
+        (Customer.business_name.ilike(name_pattern))
+    ).order_by(Device.id.desc()).limit(limit)
+
+    results = db.session.scalars(stmt).all()
 
     payload = [
         {
@@ -133,7 +160,9 @@ def repairs_search_api():
         }
         for d in results
     ]
-    return Response(json.dumps(payload), mimetype='application/json')
+    body = dumps(payload)
+    _SEARCH_CACHE.set(cache_key, body)
+    return Response(body, mimetype='application/json')
 
 
 @repairs_bp.route("/technicians", methods=["GET"])
@@ -283,7 +312,6 @@ def activate_technician(technician_id: int):
 @login_required
 @roles_required("ADMIN", "TECH")
 def add_repair():
-    customers = Customer.query.order_by(Customer.name).all()
     technicians = Technician.query.filter_by(status="Available").order_by(Technician.name).all()
     
     form_data = request.form if request.method == "POST" else None
@@ -297,7 +325,7 @@ def add_repair():
             customer_id = request.form.get("existing_customer_id")
             if not customer_id:
                 flash("Please select a customer.", "danger")
-                return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+                return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
             customer = Customer.query.get_or_404(int(customer_id))
         else:
             # Create or update customer
@@ -319,18 +347,30 @@ def add_repair():
                 # Check if phone is 11 digits
                 if not phone.isdigit() or len(phone) != 11:
                     flash("Phone number must be exactly 11 digits.", "danger")
-                    return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+                    return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
             elif not skip_phone:
                 flash("Please provide a phone number or check 'Skip phone number entry'.", "danger")
-                return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+                return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
             else:
                 # Generate a temporary phone placeholder when skipped
-                import uuid
-                phone = f"SKIP{uuid.uuid4().hex[:7].upper()}"[:11]
+                phone = f"SKIP{os.urandom(4).hex().upper()}"[:11]
             
-            customer = Customer.query.filter_by(phone=phone).first()
-            
-            if customer:
+            try:
+                customer, created = get_or_create_customer_by_phone(
+                    phone,
+                    name=customer_name or "Unknown",
+                    email=(request.form.get("customer_email") or "").strip() or None,
+                    address=(request.form.get("customer_address") or "").strip() or None,
+                    business_name=business_name,
+                    customer_type=customer_type,
+                    created_by_user_id=current_user.id,
+                )
+            except IntegrityError:
+                db.session.rollback()
+                flash('Could not create customer due to a code conflict. Please try again.', 'danger')
+                return redirect(url_for('repairs.add_repair'))
+
+            if not created:
                 # Update existing customer if requested
                 update_customer = request.form.get("update_customer_details", "no") == "yes"
                 if update_customer:
@@ -342,40 +382,6 @@ def add_repair():
                     customer.email = (request.form.get("customer_email") or "").strip() or customer.email
                     customer.address = (request.form.get("customer_address") or "").strip() or customer.address
                     customer.customer_type = customer_type
-            else:
-                # Create new customer
-                customer = Customer(
-                    customer_code=generate_customer_code(),
-                    name=customer_name or "Unknown",
-                    email=(request.form.get("customer_email") or "").strip() or None,
-                    phone=phone,
-                    address=(request.form.get("customer_address") or "").strip() or None,
-                    business_name=business_name,
-                    customer_type=customer_type,
-                    created_by_user_id=current_user.id,
-                )
-                db.session.add(customer)
-
-                # Defensive flush: if customer_code uniqueness fails (rare/race), regenerate and retry a few times
-                from sqlalchemy.exc import IntegrityError
-                for _attempt in range(3):
-                    try:
-                        db.session.flush()
-                        break
-                    except IntegrityError as ie:
-                        db.session.rollback()
-                        err_text = str(ie.orig) if getattr(ie, 'orig', None) else str(ie)
-                        if 'customer.customer_code' in err_text or 'UNIQUE constraint failed: customer.customer_code' in err_text:
-                            # regenerate a fresh customer_code and try again
-                            customer.customer_code = generate_customer_code()
-                            db.session.add(customer)
-                            continue
-                        # not a customer_code conflict -> re-raise
-                        raise
-                else:
-                    # exhausted retries
-                    flash('Could not create customer due to a code conflict. Please try again.', 'danger')
-                    return redirect(url_for('repairs.add_repair'))
 
         # Handle department selection for Business/Government customers
         department_id = None
@@ -409,7 +415,7 @@ def add_repair():
                 
                 if not dept_name:
                     flash("Department name is required when creating a new department.", "danger")
-                    return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+                    return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
                 
                 department = Department(
                     customer_id=customer.id,
@@ -430,7 +436,7 @@ def add_repair():
         device_type = request.form.get("device_type")
         if not device_type:
             flash("Device type is required.", "danger")
-            return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+            return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
 
         # Handle multiple service types (comma-separated)
         service_types = request.form.getlist("service_type")
@@ -439,19 +445,20 @@ def add_repair():
         # Duplicate detection: if serial number provided, check active tickets for same customer
         serial_number = (request.form.get("serial_number") or "").strip() or None
         if serial_number:
-            existing_dev = Device.query.filter(Device.serial_number == serial_number, Device.customer_id == customer.id).filter(Device.status != 'Completed').first()
-            if existing_dev:
+            # EXISTS probes only need a yes/no, so no Device row is hydrated
+            open_ticket = db.session.query(Device.id).filter(Device.serial_number == serial_number, Device.customer_id == customer.id).filter(Device.status != 'Completed').exists()
+            if db.session.query(open_ticket).scalar():
                 flash("A repair ticket for this serial number already exists and is not completed.", "danger")
-                return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+                return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
 
         # Also check recent similar tickets (same customer, same device_type and issue) in last 7 days
         issue_desc = (request.form.get("issue_description") or "").strip()
         if not serial_number and issue_desc:
             recent = datetime.utcnow() - timedelta(days=7)
-            similar = Device.query.filter(Device.customer_id == customer.id, Device.device_type == request.form.get("device_type"), Device.issue_description == issue_desc, Device.created_at >= recent).first()
-            if similar:
+            similar = db.session.query(Device.id).filter(Device.customer_id == customer.id, Device.device_type == request.form.get("device_type"), Device.issue_description == issue_desc, Device.created_at >= recent).exists()
+            if db.session.query(similar).scalar():
                 flash("A similar repair ticket was created recently for this customer.", "warning")
-                return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=None, form_data=form_data)
+                return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=None, form_data=form_data)
 
 
         # capture original deposit input to detect overpayment attempts
@@ -522,7 +529,7 @@ def add_repair():
     if preselected_customer_id:
         preselected_customer = Customer.query.get(preselected_customer_id)
 
-    return render_template("repairs/add_repairs.html", customers=customers, technicians=technicians, preselected_customer=preselected_customer, form_data=form_data)
+    return render_template("repairs/add_repairs.html", technicians=technicians, preselected_customer=preselected_customer, form_data=form_data)
 
 
 @repairs_bp.route("/<int:device_id>")
@@ -530,12 +537,19 @@ def add_repair():
 @roles_required("ADMIN", "TECH")
 @require_tech_can_view_details
 def repair_detail(device_id: int):
-    device = Device.query.get_or_404(device_id)
-    days_in_shop = (date.today() - device.received_date).days if device.received_date else 0
-    products = Product.query.filter_by(is_active=True, is_service=False).order_by(Product.name).all()
+    device = (
+        Device.query
+        .options(
+            selectinload(Device.parts_used_rows).joinedload(RepairPartUsed.product),  # type: ignore[arg-type]
+            joinedload(Device.owner),  # type: ignore[arg-type]
+        )
+        .filter(Device.id == device_id)
+        .first_or_404()
+    )
+    products = get_part_options()
     technicians = Technician.query.filter_by(status="Available").order_by(Technician.name).all()
     back_url = request.args.get('back_url', None)
-    return render_template("repairs/repair_detail.html", device=device, days_in_shop=days_in_shop, products=products, technicians=technicians, back_url=back_url)
+    return render_template("repairs/repair_detail.html", device=device, products=products, technicians=technicians, back_url=back_url)
 
 
 @repairs_bp.route("/<int:device_id>/status", methods=["POST"])
@@ -591,21 +605,26 @@ def update_status(device_id: int):
 @roles_required("ADMIN", "TECH")
 def claim_on_credit(device_id: int):
     """Mark device as claimed (released) on credit — no payment recorded yet, visible in sales unpaid."""
-    device = Device.query.get_or_404(device_id)
-
-    if device.payment_status == 'Paid':
+    # Mark as collected so it can be released to customer; the paid check rides in the WHERE
+    # clause so the common path is one UPDATE with no preceding SELECT
+    updated = update_device_and_return(
+        device_id,
+        where=(or_(Device.payment_status.is_(None), Device.payment_status != 'Paid'),),
+        claimed_on_credit=True,
+        status='Completed',
+        is_archived=True,
+        actual_completion=date.today(),
+    )
+    if updated is None:
+        # Either the device does not exist or it is already paid
+        if db.session.get(Device, device_id) is None:
+            abort(404)
         flash('This repair is already paid — cannot claim on credit.', 'warning')
-        return redirect(url_for('repairs.repair_detail', device_id=device.id))
-
-    device.claimed_on_credit = True
-    # Mark as collected so it can be released to customer
-    device.status = 'Completed'
-    device.is_archived = True
-    device.actual_completion = date.today()
+        return redirect(url_for('repairs.repair_detail', device_id=device_id))
 
     db.session.commit()
     flash('Device released on credit. It will appear in the unpaid sales list.', 'success')
-    return redirect(url_for('repairs.repair_detail', device_id=device.id))
+    return redirect(url_for('repairs.repair_detail', device_id=device_id))
 
 
 @repairs_bp.route("/<int:device_id>/update-details", methods=["POST"])
@@ -676,8 +695,6 @@ def update_technician_name(device_id: int):
     """AJAX endpoint to set/clear the `technician_name_override` for a device.
     Accepts form-encoded or JSON payload: { technician_name: "Name" }
     """
-    device = Device.query.get_or_404(device_id)
-
     # Accept either form POST or JSON
     name_raw = None
     if request.form.get('technician_name') is not None:
@@ -686,12 +703,13 @@ def update_technician_name(device_id: int):
         name_raw = request.json.get('technician_name')
 
     name = (name_raw or "").strip() or None
-    device.technician_name_override = name
+    if update_device_and_return(device_id, technician_name_override=name) is None:
+        abort(404)
     db.session.commit()
 
     return jsonify({
         'success': True,
-        'technician_name': device.technician_name_override or '',
+        'technician_name': name or '',
         'message': 'Technician name updated.'
     })
 
@@ -720,7 +738,7 @@ def add_part_used(device_id: int):
     product = Product.query.get_or_404(product_id)
 
     unit_price = safe_decimal(product.sell_price, "0.00")
-    line_total = unit_price * Decimal(qty)
+    line_total = unit_price * qty
 
     # Deduct stock first (strict)
     try:
@@ -730,7 +748,8 @@ def add_part_used(device_id: int):
         flash(str(e), "danger")
         return redirect(url_for("repairs.repair_detail", device_id=device.id))
 
-    # Create the RepairPartUsed row and flush so relationships/ids are available
+    # Create the RepairPartUsed row; one flush writes the stock change, movement and part
+    # together and populates new_part.id
     new_part = RepairPartUsed(
         device_id=device.id,
         product_id=product.id,
@@ -739,38 +758,40 @@ def add_part_used(device_id: int):
         line_total=line_total,
     )
     db.session.add(new_part)
-    # ensure the new row is visible in `device.parts_used_rows` before recalculation
     db.session.flush()
 
-    # Recalculate device parts_cost from all rows (defensive — avoids double-counting)
-    parts_total = sum((row.line_total for row in device.parts_used_rows), start=Decimal("0.00"))
-    device.parts_cost = parts_total
+    # The repair_part_used trigger re-summed parts_cost during the flush; reload just that column
+    db.session.refresh(device, ["parts_cost"])
 
     recompute_repair_financials(device)
 
+    # Capture the response values before commit expires the instances, so building
+    # the payload does not refresh device/part/product with extra SELECTs
+    result = {
+        "success": True,
+        "message": "Part added successfully",
+        "parts_cost": device.parts_cost,
+        "total_cost": device.total_cost,
+        "balance_due": device.balance_due,
+        "deposit_paid": device.deposit_paid,
+        "payment_status": device.payment_status,
+        "part": {
+            "id": new_part.id,
+            "product_name": product.name,
+            "qty": qty,
+            "unit_price": unit_price,
+            "line_total": line_total
+        }
+    }
+
     db.session.commit()
 
     # Return JSON for AJAX requests, redirect for form submits
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.is_json:
-        return jsonify({
-            "success": True,
-            "message": "Part added successfully",
-            "parts_cost": str(device.parts_cost),
-            "total_cost": str(device.total_cost),
-            "balance_due": str(device.balance_due),
-            "deposit_paid": str(device.deposit_paid),
-            "payment_status": device.payment_status,
-            "part": {
-                "id": new_part.id if new_part else None,
-                "product_name": new_part.product.name if new_part and new_part.product else product.name,
-                "qty": new_part.qty if new_part else qty,
-                "unit_price": str(new_part.unit_price) if new_part else str(unit_price),
-                "line_total": str(new_part.line_total) if new_part else str(line_total)
-            }
-        })
+        return json_response(result)
     else:
         flash("Part added and stock deducted.", "success")
-        return redirect(url_for("repairs.repair_detail", device_id=device.id))
+        return redirect(url_for("repairs.repair_detail", device_id=device_id))
 
 
 @repairs_bp.route("/<int:device_id>/print", methods=["GET"])
@@ -779,7 +800,21 @@ def add_part_used(device_id: int):
 def print_ticket(device_id: int):
     """Print repair ticket"""
     device = Device.query.get_or_404(device_id)
-    return render_template("repairs/print_ticket.html", device=device, now=datetime.now())
+    # Render the standalone print page directly: it needs no context processors
+    # (nav badge count, CSRF) so skip Flask's template lookup and signal dispatch.
+    return _print_ticket_template().render(device=device, now=datetime.now())
+
+
+def _print_ticket_template():
+    """Return the compiled print-ticket template, cached per app unless auto-reload is on."""
+    env = current_app.jinja_env
+    if env.auto_reload:
+        return env.get_template("repairs/print_ticket.html")
+    template = current_app.extensions.get("repairs_print_ticket_template")
+    if template is None:
+        template = env.get_template("repairs/print_ticket.html")
+        current_app.extensions["repairs_print_ticket_template"] = template
+    return template
 
 
 @repairs_bp.route("/<int:device_id>/payment", methods=["POST"])
@@ -927,23 +962,23 @@ def update_part_qty(device_id: int, part_id: int):
     
     # Update part quantity and line total
     part.qty = new_qty
-    part.line_total = part.unit_price * Decimal(new_qty)
+    part.line_total = part.unit_price * new_qty
     
-    # Recalculate device parts cost
-    parts_total = sum((row.line_total for row in device.parts_used_rows), start=Decimal("0.00"))
-    device.parts_cost = parts_total
+    # Flush so the repair_part_used trigger re-sums parts_cost, then reload that column
+    db.session.flush()
+    db.session.refresh(device, ["parts_cost"])
     
     recompute_repair_financials(device)
     
     db.session.commit()
     
-    return jsonify({
+    return json_response({
         "success": True,
-        "line_total": str(part.line_total),
-        "parts_cost": str(device.parts_cost),
-        "total_cost": str(device.total_cost),
-        "balance_due": str(device.balance_due),
-        "deposit_paid": str(device.deposit_paid),
+        "line_total": part.line_total,
+        "parts_cost": device.parts_cost,
+        "total_cost": device.total_cost,
+        "balance_due": device.balance_due,
+        "deposit_paid": device.deposit_paid,
         "payment_status": device.payment_status
     })
 
@@ -974,22 +1009,22 @@ def update_part_price(device_id: int, part_id: int):
         return jsonify({"success": False, "message": "Price must be non-negative"}), 400
 
     part.unit_price = new_price
-    part.line_total = (part.unit_price * Decimal(part.qty))
+    part.line_total = part.unit_price * part.qty
 
-    # Recalculate device parts cost
-    parts_total = sum((row.line_total for row in device.parts_used_rows), start=Decimal("0.00"))
-    device.parts_cost = parts_total
+    # Flush so the repair_part_used trigger re-sums parts_cost, then reload that column
+    db.session.flush()
+    db.session.refresh(device, ["parts_cost"])
 
     recompute_repair_financials(device)
     db.session.commit()
 
-    return jsonify({
+    return json_response({
         "success": True,
-        "line_total": str(part.line_total),
-        "parts_cost": str(device.parts_cost),
-        "total_cost": str(device.total_cost),
-        "balance_due": str(device.balance_due),
-        "deposit_paid": str(device.deposit_paid),
+        "line_total": part.line_total,
+        "parts_cost": device.parts_cost,
+        "total_cost": device.total_cost,
+        "balance_due": device.balance_due,
+        "deposit_paid": device.deposit_paid,
         "payment_status": device.payment_status
     })
 
@@ -1003,14 +1038,17 @@ def delete_repair(device_id: int):
     device = Device.query.get_or_404(device_id)
 
     try:
-        # Restore stock for parts used
-        from app.services.stock import stock_in
-        for part in list(device.parts_used_rows):
-            try:
-                stock_in(part.product, part.qty, notes=f"Restore stock - deleted repair {device.ticket_number}")
-            except Exception:
-                # if stock_in fails, continue to attempt deletion but log/rollback if necessary
-                pass
+        # Restore stock for parts used in one batched UPDATE + movement insert
+        from app.services.stock import stock_in_many
+        restorations = (
+            db.session.query(RepairPartUsed.product_id, RepairPartUsed.qty)
+            .filter(RepairPartUsed.device_id == device.id)
+            .all()
+        )
+        stock_in_many(
+            [(pid, qty) for pid, qty in restorations],
+            notes=f"Restore stock - deleted repair {device.ticket_number}",
+        )
 
         # Delete device assignments first (they have NOT NULL constraint on device_id)
         DeviceAssignment.query.filter_by(device_id=device_id).delete()
@@ -1050,9 +1088,9 @@ def delete_part(device_id: int, part_id: int):
 
     db.session.delete(part)
 
-    # Recalculate device parts cost
-    parts_total = sum((row.line_total for row in device.parts_used_rows), start=Decimal("0.00"))
-    device.parts_cost = parts_total
+    # Flush so the repair_part_used trigger re-sums parts_cost, then reload that column
+    db.session.flush()
+    db.session.refresh(device, ["parts_cost"])
 
     recompute_repair_financials(device)
     db.session.commit()
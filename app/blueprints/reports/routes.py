@@ -1,20 +1,84 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from io import StringIO
-import csv
+from collections import namedtuple
+from datetime import date, timedelta
+import hashlib
 
-from flask import render_template, request, Response
-from flask_login import login_required
-from sqlalchemy import func
+from flask import make_response, render_template, request, Response
+from flask_login import current_user, login_required
+from sqlalchemy import bindparam, case, func, select, tuple_
 
 from app.extensions import db
+from app.models.inventory import Category, Product
 from app.models.repair import Device
-from app.models.sales import Sale
 from app.services.authz import roles_required
+from app.services.csv_export import csv_field, csv_response, small_csv_response
+from app.services.financial_reconciliation import FinancialReconciliation
+from app.services.report_cache import get_report, report_generation
+from app.services.responses import dumps
 
 from . import reports_bp
 
+# One inventory report line; a fixed-layout tuple instead of a dict per product
+InventoryRow = namedtuple('InventoryRow', 'id name sku category stock cost value low reorder_qty reorder_to')
+
+# Fixed CSV header lines, written as-is ahead of the data rows
+_REPAIRS_CSV_HEADER = "Status,Count,Total Cost\r\n"
+_INVENTORY_CSV_HEADER = "SKU,Name,Category,Stock,Cost,Value,Reorder To,Reorder Qty\r\n"
+
+
+def _parse_date(name):
+    """Read query arg `name` as a YYYY-MM-DD date, or None when absent, empty or malformed"""
+    # Werkzeug turns the ValueError from a bad value into the default
+    return request.args.get(name, type=date.fromisoformat)
+
+
+def _date_bounds(column, df, dt):
+    """Filter conditions keeping `column` within the optional [df, dt] range"""
+    bounds = []
+    if df:
+        bounds.append(column >= df)
+    if dt:
+        bounds.append(column <= dt)
+    return bounds
+
+
+def _conditional_page(data, render):
+    """Render an HTML report, or answer 304 when the browser's copy is current.
+
+    The ETag covers the report `data`, the user and the report-cache
+    generation (which moves on every sale/repair/product write, so the
+    layout's nav badges are not served stale). A revalidation that matches
+    skips template rendering entirely.
+    """
+    key = repr((data, current_user.get_id(), report_generation()))
+    etag = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = make_response(render())
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def _keyset_pages(stmt, order_cols, keys, params=None, page_size=1000):
+    """Yield the rows of `stmt` page by page, resuming after the last key seen.
+
+    `stmt` must be ordered by `order_cols`, which together are unique; `keys`
+    names the matching result columns and `params` holds any bind values. Each page is a short, fully fetched
+    query, so a slow CSV download never holds a read cursor (and, on SQLite,
+    its lock) open while the whole catalog streams out.
+    """
+    page = db.session.execute(stmt.limit(page_size), params).all()
+    while page:
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+        after = tuple_(*order_cols) > tuple_(*(getattr(last, k) for k in keys))
+        page = db.session.execute(stmt.where(after).limit(page_size), params).all()
+
 
 @reports_bp.route("")
 @reports_bp.route("/")
@@ -22,7 +86,10 @@ from . import reports_bp
 @roles_required("ADMIN")
 def reports_hub():
     """Reports hub - organized access to all available report templates"""
-    return render_template("reports/hub.html")
+    resp = make_response(render_template("reports/hub.html"))
+    # Static apart from the shared layout; let the browser reuse it briefly
+    resp.headers["Cache-Control"] = "private, max-age=60"
+    return resp
 
 
 @reports_bp.route("/repairs")
@@ -34,43 +101,35 @@ def repairs_report():
     date_to = request.args.get("date_to", "")
     fmt = request.args.get("format", "html")
 
-    query = db.session.query(
-        Device.status.label("status"),
-        func.count(Device.id).label("count"),
-        func.coalesce(func.sum(Device.total_cost), 0).label("total_cost")
-    )
-
-    if date_from:
-        try:
-            df = datetime.fromisoformat(date_from).date()
-            query = query.filter(Device.received_date >= df)
-        except Exception:
-            pass
+    df = _parse_date("date_from")
+    dt = _parse_date("date_to")
 
-    if date_to:
-        try:
-            dt = datetime.fromisoformat(date_to).date()
-            query = query.filter(Device.received_date <= dt)
-        except Exception:
-            pass
+    def compute():
+        stmt = select(
+            Device.status.label("status"),
+            func.count(Device.id).label("count"),
+            func.coalesce(func.sum(Device.total_cost), 0).label("total_cost"),
+            # FILTER aggregates: the credit/partial subtotals (HTML only) come from the same scan
+            func.coalesce(func.sum(Device.total_cost).filter(Device.claimed_on_credit == True), 0).label("credit_total"),
+            func.coalesce(func.sum(Device.balance_due).filter(Device.payment_status == "Partial"), 0).label("partial_balance"),
+        ).where(*_date_bounds(Device.received_date, df, dt))
+        return db.session.execute(stmt.group_by(Device.status).order_by(Device.status)).all()
 
-    query = query.group_by(Device.status).order_by(Device.status)
-    rows = query.all()
+    rows = get_report(("repairs", df, dt), compute)
 
     # CSV export
     if fmt == "csv":
-        si = StringIO()
-        cw = csv.writer(si)
-        cw.writerow(["Status", "Count", "Total Cost"])
-        for r in rows:
-            cw.writerow([r.status, int(r.count), float(r.total_cost or 0)])
-        output = si.getvalue()
-        return Response(output, mimetype="text/csv", headers={
-            "Content-Disposition": "attachment; filename=repairs_by_status.csv"
-        })
+        def csv_rows():
+            yield _REPAIRS_CSV_HEADER
+            for r in rows:
+                yield f"{csv_field(r.status)},{int(r.count)},{float(r.total_cost or 0)}\r\n"
+        return small_csv_response(csv_rows(), "repairs_by_status.csv")
 
     # Render HTML
-    return render_template("reports/repairs.html", rows=rows, date_from=date_from, date_to=date_to)
+    return _conditional_page(
+        (rows, date_from, date_to),
+        lambda: render_template("reports/repairs.html", rows=rows, date_from=date_from, date_to=date_to),
+    )
 
 
 @reports_bp.route("/financial")
@@ -78,126 +137,114 @@ def repairs_report():
 @roles_required("ADMIN")
 def financial_report():
     """Financial summary: revenue received, accounts receivable, outstanding balances"""
-    from app.services.financial_reconciliation import FinancialReconciliation
-    from datetime import date
-    
     date_from = request.args.get("date_from", "")
     date_to = request.args.get("date_to", "")
     fmt = request.args.get("format", "html")
 
     # Parse date filters - default to showing all data if no dates provided
-    start_date = None
-    end_date = None
-    
-    if date_from:
-        try:
-            start_date = datetime.fromisoformat(date_from).date()
-        except Exception:
-            pass
-    
-    if date_to:
-        try:
-            end_date = datetime.fromisoformat(date_to).date()
-        except Exception:
-            pass
-    
+    start_date = _parse_date("date_from")
+    end_date = _parse_date("date_to")
+
     # If dates not provided, use reasonable defaults (last 90 days)
     if not start_date or not end_date:
         end_date = date.today()
         start_date = end_date - timedelta(days=90)
 
     # Generate comprehensive financial summary using unified reconciliation service
-    summary = FinancialReconciliation.generate_financial_summary(start_date, end_date)
-    
-    # Extract and ensure all values are properly formatted floats
-    revenue_received = float(summary['revenue_received']['total'])
-    sales_total = float(summary['revenue_invoiced']['sales'])
-    repairs_total = float(summary['revenue_invoiced']['repairs'])
-    combined_sales_total = float(summary['revenue_invoiced']['total'])
-    
-    sales_payments_total = float(summary['revenue_received']['sales'])
-    repair_payments_total = float(summary['revenue_received']['repairs'])
-    payments_total = revenue_received
-    
-    # Outstanding breakdown (current, not period-filtered) - consolidated structure
-    outstanding_detail = {
-        'pending_sales': float(summary['outstanding'].get('pending_sales', 0)),
-        'sales_balance_due': float(summary['outstanding'].get('sales_balance_due', 0)),
-        'total_sales_outstanding': float(summary['outstanding'].get('total_sales_outstanding', 0)),
-        'pending_repairs': float(summary['outstanding'].get('pending_repairs', 0)),
-        'repairs_balance_due': float(summary['outstanding'].get('repairs_balance_due', 0)),
-        'total_repairs_outstanding': float(summary['outstanding'].get('total_repairs_outstanding', 0)),
-        'total_outstanding': float(summary['outstanding'].get('total_outstanding', 0)),
-    }
-    
-    # For backward compatibility and CSV export
-    outstanding = outstanding_detail['total_outstanding']
+    summary = get_report(
+        ("financial", start_date, end_date),
+        lambda: FinancialReconciliation.generate_financial_summary(start_date, end_date),
+    )
     
-    # These are now consolidated into sales_balance_due and repairs_balance_due
-    # Keep for CSV and other compatibility needs
-    partial_repairs_total = outstanding_detail['repairs_balance_due']  # consolidated
-    credit_repairs_total = outstanding_detail['repairs_balance_due']   # same as above (for compatibility)
-    credit_sales_total = outstanding_detail['sales_balance_due']       # consolidated
-    partial_sales_total = outstanding_detail['sales_balance_due']      # same as above (for compatibility)
-
-    # CSV export
+    # CSV export: written straight from the summary, skipping the template bookkeeping below
     if fmt == 'csv':
-        si = StringIO()
-        cw = csv.writer(si)
-        cw.writerow(["Financial Summary Report", f"{start_date} to {end_date}"])
-        cw.writerow([])
-        
-        cw.writerow(["REVENUE INVOICED (Period)", "Amount"])
-        cw.writerow(["Sales Total", sales_total])
-        cw.writerow(["Repairs Total", repairs_total])
-        cw.writerow(["Total Revenue Invoiced", combined_sales_total])
-        cw.writerow([])
-        
-        cw.writerow(["REVENUE RECEIVED (Period)", "Amount"])
-        cw.writerow(["Sales Payments", sales_payments_total])
-        cw.writerow(["Repair Payments", repair_payments_total])
-        cw.writerow(["Total Revenue Received", payments_total])
-        cw.writerow([])
-        
-        cw.writerow(["ACCOUNTS RECEIVABLE (Current)", "Amount"])
-        cw.writerow(["Pending Sales", outstanding_detail['pending_sales']])
-        cw.writerow(["Sales Balance Due", outstanding_detail['sales_balance_due']])
-        cw.writerow(["Total Sales Outstanding", outstanding_detail['total_sales_outstanding']])
-        cw.writerow([])
-        
-        cw.writerow(["Pending Repairs", outstanding_detail['pending_repairs']])
-        cw.writerow(["Repairs Balance Due", outstanding_detail['repairs_balance_due']])
-        cw.writerow(["Total Repairs Outstanding", outstanding_detail['total_repairs_outstanding']])
-        cw.writerow([])
-        
-        cw.writerow(["TOTAL OUTSTANDING (Current)", outstanding_detail['total_outstanding']])
-        
-        output = si.getvalue()
-        return Response(output, mimetype="text/csv", headers={"Content-Disposition": "attachment; filename=financial_summary.csv"})
-
-    return render_template(
-        'reports/financial.html',
-        # Revenue Invoiced (accrual basis)
-        sales_total=sales_total,
-        repairs_total=repairs_total,
-        combined_sales_total=combined_sales_total,
-        # Revenue Received (cash basis)
-        payments_total=payments_total,
-        sales_payments_total=sales_payments_total,
-        repair_payments_total=repair_payments_total,
-        # Outstanding Breakdown (current state, not period-bound)
-        outstanding=outstanding,
-        partial_repairs_total=partial_repairs_total,
-        credit_repairs_total=credit_repairs_total,
-        credit_sales_total=credit_sales_total,
-        partial_sales_total=partial_sales_total,
-        # Summary for display
-        outstanding_detail=outstanding_detail,
-        date_from=date_from,
-        date_to=date_to,
+        invoiced = summary['revenue_invoiced']
+        received = summary['revenue_received']
+        owed = summary['outstanding']
+
+        def csv_rows():
+            yield f"Financial Summary Report,{start_date} to {end_date}\r\n"
+            yield "\r\n"
+
+            yield "REVENUE INVOICED (Period),Amount\r\n"
+            yield f"Sales Total,{invoiced['sales']}\r\n"
+            yield f"Repairs Total,{invoiced['repairs']}\r\n"
+            yield f"Total Revenue Invoiced,{invoiced['total']}\r\n"
+            yield "\r\n"
+
+            yield "REVENUE RECEIVED (Period),Amount\r\n"
+            yield f"Sales Payments,{received['sales']}\r\n"
+            yield f"Repair Payments,{received['repairs']}\r\n"
+            yield f"Total Revenue Received,{received['total']}\r\n"
+            yield "\r\n"
+
+            yield "ACCOUNTS RECEIVABLE (Current),Amount\r\n"
+            yield f"Pending Sales,{owed['pending_sales']}\r\n"
+            yield f"Sales Balance Due,{owed['sales_balance_due']}\r\n"
+            yield f"Total Sales Outstanding,{owed['total_sales_outstanding']}\r\n"
+            yield "\r\n"
+
+            yield f"Pending Repairs,{owed['pending_repairs']}\r\n"
+            yield f"Repairs Balance Due,{owed['repairs_balance_due']}\r\n"
+            yield f"Total Repairs Outstanding,{owed['total_repairs_outstanding']}\r\n"
+            yield "\r\n"
+
+            yield f"TOTAL OUTSTANDING (Current),{owed['total_outstanding']}\r\n"
+
+        return small_csv_response(csv_rows(), "financial_summary.csv")
+
+    # The template reads figures straight from the summary's sections
+    return _conditional_page(
+        (summary, date_from, date_to),
+        lambda: render_template('reports/financial.html', summary=summary, date_from=date_from, date_to=date_to),
     )
 
 
+def _build_inventory_stmt():
+    """Inventory report SELECT: plain columns plus the stock value and reorder
+    figures computed in SQL, so no Product objects are built. The low-stock
+    threshold is the :low bind parameter."""
+    low = Product.stock_on_hand <= bindparam('low')
+    shortfall = Product.reorder_to - Product.stock_on_hand
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.sku,
+            Category.name.label('category'),
+            Product.stock_on_hand,
+            Product.cost_price,
+            (func.coalesce(Product.cost_price, 0) * func.coalesce(Product.stock_on_hand, 0)).label('value'),
+            Product.reorder_to,
+            low.label('low'),
+            case((low & (shortfall > 0), shortfall), else_=0).label('reorder_qty'),
+        )
+        .outerjoin(Category, Product.category_id == Category.id)
+        .order_by(Product.name, Product.id)
+    )
+
+
+# Built once per process; each request only binds its threshold
+_INVENTORY_STMT = _build_inventory_stmt()
+
+
+def _inventory_rows(result):
+    for p in result:
+        yield InventoryRow(p.id, p.name, p.sku, p.category, p.stock_on_hand, float(p.cost_price or 0), round(float(p.value or 0), 2), bool(p.low), p.reorder_qty, p.reorder_to)
+
+
+def _inventory_report_data(low_threshold):
+    """Return `(rows, total_value)` for the inventory report, via the report cache"""
+    def compute():
+        rows = list(_inventory_rows(db.session.execute(_INVENTORY_STMT, {'low': low_threshold})))
+        # Every row is already in hand, so summing here saves a second aggregate query.
+        # Add whole cents as ints so the total cannot drift like repeated float adds do.
+        total_cents = sum(round(r.value * 100) for r in rows)
+        return rows, total_cents / 100
+
+    return get_report(('inventory', low_threshold), compute)
+
+
 @reports_bp.route('/inventory')
 @login_required
 @roles_required('ADMIN')
@@ -206,24 +253,35 @@ def inventory_report():
     low_threshold = request.args.get('low', 5, type=int)
     fmt = request.args.get('format', 'html')
 
-    from app.models.inventory import Product
-    products = Product.query.order_by(Product.name).all()
+    if fmt == 'csv':
+        def csv_rows():
+            yield _INVENTORY_CSV_HEADER
+            pages = _keyset_pages(_INVENTORY_STMT, (Product.name, Product.id), ('name', 'id'), {'low': low_threshold})
+            for r in _inventory_rows(pages):
+                yield f"{csv_field(r.sku)},{csv_field(r.name)},{csv_field(r.category)},{r.stock},{r.cost},{r.value},{r.reorder_to},{r.reorder_qty}\r\n"
+        return csv_response(csv_rows(), 'inventory_report.csv')
 
-    rows = []
-    total_value = 0.0
-    for p in products:
-        value = float((p.cost_price or 0) * (p.stock_on_hand or 0))
-        total_value += value
-        reorder_qty = max(0, p.reorder_to - p.stock_on_hand) if p.stock_on_hand <= low_threshold else 0
-        rows.append({'id': p.id, 'name': p.name, 'sku': p.sku, 'category': p.category.name if p.category else None, 'stock': p.stock_on_hand, 'cost': float(p.cost_price or 0), 'value': value, 'low': p.stock_on_hand <= low_threshold, 'reorder_qty': reorder_qty, 'reorder_to': p.reorder_to})
+    rows, total_value = _inventory_report_data(low_threshold)
 
-    if fmt == 'csv':
-        si = StringIO()
-        cw = csv.writer(si)
-        cw.writerow(['SKU', 'Name', 'Category', 'Stock', 'Cost', 'Value', 'Reorder To', 'Reorder Qty'])
-        for r in rows:
-            cw.writerow([r['sku'] or '', r['name'], r['category'] or '', r['stock'], r['cost'], r['value'], r['reorder_to'], r['reorder_qty']])
-        output = si.getvalue()
-        return Response(output, mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=inventory_report.csv'})
-
-    return render_template('reports/inventory.html', rows=rows, total_value=total_value, low_threshold=low_threshold)
+    return _conditional_page(
+        (rows, total_value, low_threshold),
+        lambda: render_template('reports/inventory.html', rows=rows, total_value=total_value, low_threshold=low_threshold),
+    )
+
+
+@reports_bp.route('/inventory.json')
+@login_required
+@roles_required('ADMIN')
+def inventory_report_json():
+    """Inventory report rows as JSON, with an ETag so unchanged data costs a 304"""
+    low_threshold = request.args.get('low', 5, type=int)
+
+    def serialize():
+        rows, total_value = _inventory_report_data(low_threshold)
+        return dumps({'rows': [r._asdict() for r in rows], 'total_value': total_value, 'low_threshold': low_threshold})
+
+    # The encoded body is cached alongside the rows, so a revalidation only hashes it
+    resp = Response(get_report(('inventory.json', low_threshold), serialize), mimetype='application/json')
+    resp.add_etag()
+    resp.headers['Cache-Control'] = 'private, max-age=30'
+    return resp.make_conditional(request)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from decimal import Decimal
+from collections import defaultdict, namedtuple
+from decimal import ROUND_HALF_UP, Decimal
 from flask import (
+    abort,
     render_template,
     request,
     redirect,
@@ -9,13 +11,10 @@ from flask import (
     flash,
     jsonify,
     current_app as app,
-    Response,
 )
 from flask_login import login_required
 from datetime import datetime, timedelta, date, time
-import json
-from io import StringIO
-import csv
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,18 +24,38 @@ from app.models.customer import Customer
 from app.models.inventory import Product
 from app.models.sales import Sale, SaleItem, SalePayment
 from app.models.repair import RepairPartUsed, Device
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased, joinedload, selectinload
 from app.services.authz import roles_required
 from app.services.guards import require_pos_enabled
 from app.services.codes import generate_invoice_no
-from app.services.stock import stock_out, stock_in, StockError
+from app.services.csv_export import csv_line, small_csv_response
+from app.services.stock import stock_out_many, stock_in, StockError
 from app.services.financials import safe_decimal
-from app.services.pagination import get_page_args, paginate_sequence
+from app.services.pagination import Pagination, get_page_args
+from app.services.product_cache import get_pos_products
 from app.services.report_service import ReportService
-from sqlalchemy import func, or_, and_
+from sqlalchemy import func, literal, or_, and_, select, union_all
 
 from . import sales_bp
 
+# One validated POS cart line; price is the (possibly overridden) unit price
+CartItem = namedtuple("CartItem", "product_id qty price")
+
+
+def _parse_cart(items_json):
+    """Decode the POS cart JSON into `CartItem` tuples in a single pass.
+
+    Raises ValueError when the payload is not valid JSON or is not a list of
+    objects with integer `product_id` and `qty`.
+    """
+    try:
+        return [
+            CartItem(int(item["product_id"]), int(item["qty"]), safe_decimal(item.get("price"), "0.00"))
+            for item in orjson.loads(items_json)
+        ]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError("malformed cart item") from e
+
 
 @sales_bp.route("/pos", methods=["GET", "POST"])
 @login_required
@@ -46,24 +65,15 @@ def pos():
     """
     Point of Sale - multi-item cart with optional customer details
     """
-    products_list = Product.query.filter_by(is_active=True).order_by(Product.name).all()
+    products, products_data = get_pos_products()
     customers = Customer.query.order_by(Customer.name).all()
 
-    # convert products to JSON early so it is always available for rendering
-    products_json = [{
-        "id": p.id,
-        "name": p.name,
-        "sku": p.sku,
-        "sell_price": float(p.sell_price),
-        "stock_on_hand": p.stock_on_hand,
-        "is_service": p.is_service
-    } for p in products_list]
-
     def render_pos_with_data(**extra):
         # always include base context
         return render_template(
             "sales/pos.html",
-            products=products_json,
+            products=products,
+            products_data=products_data,
             customers=customers,
             preselected_customer=extra.pop('preselected_customer', None),
             **extra
@@ -72,7 +82,6 @@ def pos():
     if request.method == "POST":
         try:
             items_json = request.form.get("items", "[]")
-            items = json.loads(items_json)
             # collect preload data for re-render
             preload = {
                 'preloaded_items_json': items_json,
@@ -86,6 +95,11 @@ def pos():
                 'preloaded_new_department_name': request.form.get('new_department_name'),
                 'preloaded_new_department_contact': request.form.get('new_department_contact')
             }
+            try:
+                items = _parse_cart(items_json)
+            except ValueError:
+                flash("Invalid cart data. Please try again.", "danger")
+                return render_pos_with_data(**preload)
             if not items:
                 flash("Your cart is empty. Please add items before completing the sale.", "danger")
                 return render_pos_with_data(**preload)
@@ -108,29 +122,36 @@ def pos():
                 flash('Cannot record a deposit and claim on credit at the same time.', 'danger')
                 return render_pos_with_data(**preload)
             
-            subtotal = Decimal("0.00")
+            # Sum in integer cents; Decimals are built once per line for the SaleItem
+            subtotal_cents = 0
             items_with_products = []
+
+            # Load every product in the cart with one IN query instead of one lookup per line
+            product_ids = {item.product_id for item in items}
+            products_by_id = {p.id: p for p in Product.query.filter(Product.id.in_(product_ids))}
             
-            for item in items:
-                product_id = int(item.get("product_id"))
-                qty = int(item.get("qty"))
-                item_price = safe_decimal(item.get("price"), "0.00")  # Allow price override
-                
+            for product_id, qty, item_price in items:
                 if qty <= 0:
                     flash("Invalid quantity. Please enter a quantity greater than 0.", "danger")
                     return render_pos_with_data(**preload)
                 
-                product = Product.query.get_or_404(product_id)
+                product = products_by_id.get(product_id)
+                if product is None:
+                    abort(404)
                 
                 # Check stock only for non-services
                 if not product.is_service and qty > product.stock_on_hand:
                     flash(f"Not enough stock for {product.name}. Available: {product.stock_on_hand}", "danger")
                     return render_pos_with_data(**preload)
                 
-                # Use provided price or product's sell price
+                # Use provided price or product's sell price, rounded once to whole cents
+                # so the stored unit price, line total and subtotal all agree
                 unit_price = item_price if item_price is not None else safe_decimal(product.sell_price, "0.00")
-                line_total = unit_price * Decimal(qty)
-                subtotal += line_total
+                unit_cents = int(unit_price.scaleb(2).to_integral_value(ROUND_HALF_UP))
+                unit_price = Decimal(unit_cents).scaleb(-2)
+                line_cents = unit_cents * qty
+                subtotal_cents += line_cents
+                line_total = Decimal(line_cents).scaleb(-2)
                 
                 items_with_products.append({
                     "product": product,
@@ -139,6 +160,7 @@ def pos():
                     "line_total": line_total
                 })
             
+            subtotal = Decimal(subtotal_cents).scaleb(-2)
             total = max(Decimal("0.00"), subtotal - discount)
             
             # Get payment amount and notes from POS
@@ -177,15 +199,17 @@ def pos():
                     line_total=line_total
                 )
                 db.session.add(sale_item)
-                
-                # Deduct stock for non-services
-                if not product.is_service:
-                    try:
-                        stock_out(product, qty, reference_type="SALE", reference_id=sale.id, notes=f"Invoice {sale.invoice_no}")
-                    except StockError as e:
-                        db.session.rollback()
-                        flash(f"Stock error: {str(e)}", "danger")
-                        return render_pos_with_data(**preload)
+
+            # Deduct stock for every non-service line with one UPDATE
+            try:
+                stock_out_many(
+                    [(d["product"].id, d["qty"]) for d in items_with_products if not d["product"].is_service],
+                    reference_type="SALE", reference_id=sale.id, notes=f"Invoice {sale.invoice_no}",
+                )
+            except StockError as e:
+                db.session.rollback()
+                flash(f"Stock error: {str(e)}", "danger")
+                return render_pos_with_data(**preload)
             
             # Record payment unless this is a credited sale (no immediate payment)
             if not claim_on_credit and payment_amount > 0:
@@ -201,24 +225,11 @@ def pos():
             flash(f"Sale completed! Invoice: {sale.invoice_no}", "success")
             return redirect(url_for("sales.invoice", sale_id=sale.id))
             
-        except json.JSONDecodeError:
-            flash("Invalid cart data. Please try again.", "danger")
-            return render_pos_with_data(**preload)
         except Exception as e:
             db.session.rollback()
             flash(f"Error processing sale: {str(e)}", "danger")
             return render_pos_with_data(**preload)
 
-    # Convert products to JSON for frontend
-    products_json = [{
-        "id": p.id,
-        "name": p.name,
-        "sku": p.sku,
-        "sell_price": float(p.sell_price),
-        "stock_on_hand": p.stock_on_hand,
-        "is_service": p.is_service
-    } for p in products_list]
-    
     # Check for preselected customer from query parameter
     preselected_customer = None
     preselected_customer_id = request.args.get("customer_id", type=int)
@@ -241,6 +252,161 @@ def pos():
     )
 
 
+def _sale_payment_totals(sale_ids):
+    """Map each sale id to ``(payments_total, latest_paid_at)`` with one GROUP BY query"""
+    if not sale_ids:
+        return {}
+    rows = db.session.execute(
+        select(SalePayment.sale_id, func.sum(SalePayment.amount), func.max(SalePayment.paid_at))
+        .where(SalePayment.sale_id.in_(sale_ids))
+        .group_by(SalePayment.sale_id)
+    )
+    return {sale_id: (total or 0, latest) for sale_id, total, latest in rows}
+
+
+def _sale_history_entry(s, payments_total, latest_payment_date):
+    """One sales_list history row for sale `s` (items and customer already loaded)"""
+    items = s.items or []
+    active_items = [item for item in items if not item.is_revoked]
+    cust = s.customer
+    customer_name = (cust.name or '') if cust else ''
+    # Searchable string containing invoice, customer name/code/phone and product SKUs/names
+    search_text = ' '.join(filter(None, [
+        s.invoice_no,
+        customer_name,
+        cust.customer_code if cust else None,
+        cust.phone if cust else None,
+        *(f"{item.product.sku or ''} {item.product.name or ''}" for item in active_items if item.product),
+    ]))
+    total = s.total or 0
+    return {
+        'type': 'sale',
+        'invoice': s.invoice_no,
+        'created_at': s.created_at,
+        'latest_payment_date': latest_payment_date,
+        'items_count': sum(item.qty for item in active_items),
+        'revoked_items_count': sum(item.qty for item in items if item.is_revoked),
+        # Itemized product list (only active items)
+        'itemized_products': [{
+            'name': item.product.name if item.product else 'Unknown',
+            'sku': item.product.sku if item.product else 'N/A',
+            'qty': item.qty,
+            'price': float(item.unit_price or 0),
+            'total': float(item.line_total or 0),
+        } for item in active_items],
+        'subtotal': float(s.subtotal or 0),
+        'discount': float(s.discount or 0),
+        'total': float(total),
+        'status': s.status,
+        'id': s.id,
+        'balance_due': float(total - payments_total),
+        'payments_total': payments_total,
+        'claimed_on_credit': s.claimed_on_credit,
+        'search_text': search_text,
+        'customer_name': customer_name,
+        'company_name': (cust.business_name or '') if cust else '',
+    }
+
+
+def _device_history_entry(d):
+    """One sales_list history row for repair `d` (parts and owner already loaded)"""
+    parts = d.parts_used_rows or []
+    owner = d.owner
+    customer_name = (owner.name or '') if owner else ''
+    # Date the repair by completion when known (the Date column becomes midnight,
+    # matching the COALESCE used to page the history), else by creation
+    tx_date = datetime.combine(d.actual_completion, time.min) if d.actual_completion else d.created_at
+    search_text = ' '.join(filter(None, [
+        d.ticket_number,
+        customer_name,
+        *(f"{p.product.sku or ''} {p.product.name or ''}" for p in parts if p.product),
+        d.service_type,
+    ]))
+    total_cost = d.total_cost or 0
+    balance_due = d.balance_due or 0
+    return {
+        'type': 'repair',
+        'invoice': d.ticket_number,
+        'created_at': tx_date,
+        # Latest payment date for repairs is the deposit date
+        'latest_payment_date': d.deposit_paid_at if d.deposit_paid and d.deposit_paid > 0 else None,
+        'items_count': sum(p.qty for p in parts),
+        'subtotal': float(total_cost),
+        'discount': 0.0,
+        'total': float(total_cost),
+        'status': d.payment_status,
+        'id': d.id,
+        'balance_due': float(balance_due),
+        'payments_total': float(total_cost - balance_due),
+        'claimed_on_credit': d.claimed_on_credit,
+        'search_text': search_text,
+        'customer_name': customer_name,
+        'company_name': (owner.business_name or '') if owner else '',
+    }
+
+
+def _history_page(sales_filters, devices_filters, page, per_page):
+    """One Pagination page of the merged sales + repairs history, newest first.
+
+    Sales and repairs are paged together in SQL: only the (kind, id, date)
+    keys of the merged history are sorted, and only the current page's rows
+    are loaded. Repairs are dated by completion when known, as in the list.
+    """
+    history_keys = union_all(
+        select(literal('sale').label('kind'), Sale.id.label('id'), Sale.created_at.label('sort_at'))
+        .where(*sales_filters),
+        select(literal('repair'), Device.id, func.coalesce(Device.actual_completion, Device.created_at))
+        .where(*devices_filters),
+    ).subquery()
+    try:
+        total = db.session.scalar(select(func.count()).select_from(history_keys)) or 0
+        page_keys = db.session.execute(
+            select(history_keys.c.kind, history_keys.c.id)
+            .order_by(history_keys.c.sort_at.desc(), history_keys.c.kind, history_keys.c.id.desc())
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        ).all()
+    except Exception as e:
+        app.logger.error(f"Sales history query error: {str(e)}")
+        db.session.rollback()
+        total = 0
+        page_keys = []
+
+    sale_ids = [key.id for key in page_keys if key.kind == 'sale']
+    device_ids = [key.id for key in page_keys if key.kind == 'repair']
+
+    # Eager load items and product for just this page's sales (avoids N+1); the
+    # items collection uses selectinload so it never multiplies the sale rows.
+    # Payments are only summed, so they are aggregated in SQL instead of loaded.
+    sales = Sale.query.options(
+        selectinload(Sale.items).joinedload(SaleItem.product),  # type: ignore[arg-type]
+        joinedload(Sale.customer),  # type: ignore[arg-type]
+    ).filter(Sale.id.in_(sale_ids)).all() if sale_ids else []
+    payment_totals = _sale_payment_totals(sale_ids)
+
+    # Devices / Repairs (eager-load parts + owner)
+    devices = Device.query.options(
+        selectinload(Device.parts_used_rows).joinedload(RepairPartUsed.product),  # type: ignore[arg-type]
+        joinedload(Device.owner),  # type: ignore[arg-type]
+    ).filter(Device.id.in_(device_ids)).all() if device_ids else []
+
+    # Build unified history entries in the order SQL returned their keys, so the
+    # page needs no re-sort (and never compares sale datetimes with repair dates)
+    sales_by_id = {s.id: s for s in sales}
+    devices_by_id = {d.id: d for d in devices}
+    history = []
+    for key in page_keys:
+        try:
+            if key.kind == 'sale':
+                history.append(_sale_history_entry(sales_by_id[key.id], *payment_totals.get(key.id, (0, None))))
+            else:
+                history.append(_device_history_entry(devices_by_id[key.id]))
+        except Exception as e:
+            app.logger.warning(f"Error building {key.kind} history entry: {str(e)}")
+
+    return Pagination(items=history, page=page, per_page=per_page, total=total)
+
+
 @sales_bp.route("/list")
 @login_required
 @roles_required("ADMIN", "SALES")
@@ -263,298 +429,70 @@ def sales_list():
     except Exception:
         date_from = date_to = None
 
+    page, per_page = get_page_args()
+    sales_filters = []
+    devices_filters = []
+
     # Run DB-backed multi-field ilike search whenever there's a query or explicit filters
     if q or status or date_from or date_to:
         pattern = f"%{q}%" if q else None
-        page, per_page = get_page_args()
-        fetch_limit = max(per_page * 10, 200)  # cap how many rows each DB query will return for merging
 
-        # Sales queries (use joinedload to avoid N+1 when building history)
-        try:
-            sales_base = Sale.query.options(
-                joinedload(Sale.items).joinedload(SaleItem.product),  # type: ignore[arg-type]
-                joinedload(Sale.customer),  # type: ignore[arg-type]
-                joinedload(Sale.payments)  # type: ignore[arg-type]
-            )
-            if status:
-                sales_base = sales_base.filter(Sale.status.ilike(status.upper()))
-            if date_from:
-                sales_base = sales_base.filter(Sale.created_at >= date_from)
-            if date_to:
-                sales_base = sales_base.filter(Sale.created_at <= date_to)
-
-            sales_invoice = []
-            sales_customer = []
-            sales_product = []
-            if pattern:
-                sales_invoice = sales_base.filter(Sale.invoice_no.ilike(pattern)).order_by(Sale.created_at.desc()).limit(fetch_limit).all()
-                sales_customer = (
-                    sales_base.join(Customer)
-                    .filter(
-                        or_(
-                            Customer.name.ilike(pattern),
-                            Customer.phone.ilike(pattern),
-                            Customer.customer_code.ilike(pattern)
-                        )
-                    )
-                    .order_by(Sale.created_at.desc())
-                    .limit(fetch_limit)
-                    .all()
-                )
-                sales_product = (
-                    sales_base.join(SaleItem).join(Product)
-                    .filter(or_(Product.name.ilike(pattern), Product.sku.ilike(pattern)))
-                    .order_by(Sale.created_at.desc())
-                    .distinct()
-                    .limit(fetch_limit)
-                    .all()
-                )
-
-                # Also allow searching by payment method on the sale (e.g., Cash)
-                sales_payment = (
-                    sales_base.join(SalePayment).filter(SalePayment.method.ilike(pattern)).order_by(Sale.created_at.desc()).distinct().limit(fetch_limit).all()
+        if status:
+            sales_filters.append(Sale.status.ilike(status.upper()))
+            # Device.payment_status is Title-cased (e.g. 'Paid')
+            devices_filters.append(Device.payment_status.ilike(status.capitalize()))
+        if date_from:
+            sales_filters.append(Sale.created_at >= date_from)
+            devices_filters.append(or_(Device.actual_completion >= date_from.date(), Device.created_at >= date_from))
+        if date_to:
+            sales_filters.append(Sale.created_at <= date_to)
+            devices_filters.append(or_(Device.actual_completion <= date_to.date(), Device.created_at <= date_to))
+
+        if pattern:
+            # EXISTS subqueries match customer, product and payment method
+            # without joins, so there is no row fan-out or DISTINCT
+            sales_filters.append(
+                or_(
+                    Sale.invoice_no.ilike(pattern),
+                    Sale.customer.has(or_(
+                        Customer.name.ilike(pattern),
+                        Customer.phone.ilike(pattern),
+                        Customer.customer_code.ilike(pattern)
+                    )),
+                    Sale.items.any(SaleItem.product.has(or_(Product.name.ilike(pattern), Product.sku.ilike(pattern)))),
+                    Sale.payments.any(SalePayment.method.ilike(pattern)),
                 )
-                # include payment-method matches in merge
-                sales_invoice = sales_invoice + sales_payment if sales_payment else sales_invoice
-            else:
-                # no textual query, but filters present -> pull matching sales
-                sales_invoice = sales_base.order_by(Sale.created_at.desc()).limit(fetch_limit).all()
-
-            # Merge and deduplicate
-            sales_set = {}
-            for s in sales_invoice + sales_customer + sales_product:
-                sales_set[s.id] = s
-            sales = list(sales_set.values())
-        except Exception as e:
-            app.logger.error(f"Sales search error: {str(e)}")
-            sales = []
-
-        # Devices / Repairs queries (eager-load parts + owner)
-        try:
-            devices_base = Device.query.options(
-                joinedload(Device.parts_used_rows).joinedload(RepairPartUsed.product),  # type: ignore[arg-type]
-                joinedload(Device.owner),  # type: ignore[arg-type]
             )
-            if status:
-                # Device.payment_status is Title-cased (e.g. 'Paid')
-                devices_base = devices_base.filter(Device.payment_status.ilike(status.capitalize()))
-            if date_from:
-                devices_base = devices_base.filter(
-                    or_(Device.actual_completion >= (date_from.date() if hasattr(date_from, 'date') else None), Device.created_at >= date_from)
-                )
-            if date_to:
-                devices_base = devices_base.filter(
-                    or_(Device.actual_completion <= (date_to.date() if hasattr(date_to, 'date') else None), Device.created_at <= date_to)
-                )
-
-            devices_ticket = []
-            devices_service = []
-            devices_customer = []
-            devices_product = []
-            if pattern:
-                devices_ticket = devices_base.filter(Device.ticket_number.ilike(pattern)).order_by(Device.created_at.desc()).limit(fetch_limit).all()
-                devices_service = devices_base.filter(Device.service_type.ilike(pattern)).order_by(Device.created_at.desc()).limit(fetch_limit).all()
-                devices_customer = (
-                    devices_base.join(Customer)
-                    .filter(
-                        or_(
-                            Customer.name.ilike(pattern),
-                            Customer.phone.ilike(pattern),
-                            Customer.customer_code.ilike(pattern)
-                        )
-                    )
-                    .order_by(Device.created_at.desc())
-                    .limit(fetch_limit)
-                    .all()
+            devices_filters.append(
+                or_(
+                    Device.ticket_number.ilike(pattern),
+                    Device.service_type.ilike(pattern),
+                    Device.owner.has(or_(
+                        Customer.name.ilike(pattern),
+                        Customer.phone.ilike(pattern),
+                        Customer.customer_code.ilike(pattern)
+                    )),
+                    Device.parts_used_rows.any(RepairPartUsed.product.has(or_(Product.name.ilike(pattern), Product.sku.ilike(pattern)))),
                 )
-                devices_product = devices_base.join(RepairPartUsed).join(Product).filter(or_(Product.name.ilike(pattern), Product.sku.ilike(pattern))).order_by(Device.created_at.desc()).distinct().limit(fetch_limit).all()
-            else:
-                devices_ticket = devices_base.order_by(Device.created_at.desc()).limit(fetch_limit).all()
-
-            # Merge and deduplicate
-            devices_set = {}
-            for d in devices_ticket + devices_service + devices_customer + devices_product:
-                devices_set[d.id] = d
-            devices = list(devices_set.values())
-        except Exception as e:
-            app.logger.error(f"Devices search error: {str(e)}")
-            devices = []
+            )
     else:
-        # Regular recent sales (eager load items and product to avoid N+1)
-        try:
-            sales = Sale.query.options(
-                joinedload(Sale.items).joinedload(SaleItem.product),  # type: ignore[arg-type]
-                joinedload(Sale.customer),  # type: ignore[arg-type]
-                joinedload(Sale.payments)  # type: ignore[arg-type]
-            ).order_by(Sale.created_at.desc()).limit(200).all()
-        except Exception as e:
-            app.logger.error(f"Sales fetch error: {str(e)}")
-            sales = []
-
         # Devices that have monetary transactions (parts, repair cost) or released on credit
-        try:
-            devices = Device.query.options(
-                joinedload(Device.parts_used_rows).joinedload(RepairPartUsed.product),  # type: ignore[arg-type]
-                joinedload(Device.owner),  # type: ignore[arg-type]
-            ).filter(
-                or_(
-                    Device.parts_used_rows.any(),
-                    Device.total_cost > 0,
-                    Device.claimed_on_credit == True
-                )
-            ).order_by(Device.created_at.desc()).limit(200).all()
-        except Exception as e:
-            app.logger.error(f"Devices fetch error: {str(e)}")
-            devices = []
-
-    # Build unified history entries with a searchable text blob
-    history = []
-    try:
-        for s in sales:
-            try:
-                items_count = sum(item.qty for item in (s.items or []) if not item.is_revoked) if s.items else 0
-                revoked_items_count = sum(item.qty for item in (s.items or []) if item.is_revoked) if s.items else 0
-                
-                # Build itemized product list (only active items)
-                itemized_products = []
-                for item in (s.items or []):
-                    if not item.is_revoked:  # Only include active items
-                        itemized_products.append({
-                            'name': item.product.name if item.product else 'Unknown',
-                            'sku': item.product.sku if item.product else 'N/A',
-                            'qty': item.qty,
-                            'price': float(item.unit_price or 0),
-                            'total': float(item.line_total or 0),
-                        })
-                
-                # Build a searchable string containing invoice, customer name/code/phone and product SKUs/names
-                parts_text = ' '.join(
-                    f"{item.product.sku or ''} {item.product.name or ''}" for item in (s.items or []) if item.product and not item.is_revoked
-                )
-                customer_name = ''
-                company_name = ''
-                if getattr(s, 'customer', None):
-                    customer_name = s.customer.name or ''
-                    company_name = s.customer.business_name or ''
-                customer_phone = s.customer.phone if getattr(s, 'customer', None) and getattr(s.customer, 'phone', None) else ''
-                customer_code = s.customer.customer_code if getattr(s, 'customer', None) and getattr(s.customer, 'customer_code', None) else ''
-                payment_methods = ' '.join((p.method or '') for p in (s.payments or []))
-                search_text = f"{s.invoice_no or ''} {customer_name} {customer_code} {customer_phone} {parts_text} {payment_methods}"
-
-                # compute payments total and remaining balance for sale
-                payments_total = sum((p.amount or 0) for p in (s.payments or []))
-                balance_due = float((s.total or 0) - payments_total)
-                
-                # Get latest payment date (use most recent paid_at from SalePayment records)
-                latest_payment_date = None
-                if s.payments:
-                    # Find the most recent payment date
-                    payment_dates = [p.paid_at for p in s.payments if p.paid_at]
-                    if payment_dates:
-                        latest_payment_date = max(payment_dates)
-
-                history.append({
-                    'type': 'sale',
-                    'invoice': s.invoice_no,
-                    'created_at': s.created_at,
-                    'latest_payment_date': latest_payment_date,
-                    'items_count': items_count,
-                    'revoked_items_count': revoked_items_count,
-                    'itemized_products': itemized_products,
-                    'subtotal': float(s.subtotal or 0),
-                    'discount': float(s.discount or 0),
-                    'total': float(s.total or 0),
-                    'status': s.status,
-                    'id': s.id,
-                    'balance_due': balance_due,
-                    'payments_total': payments_total,
-                    'claimed_on_credit': getattr(s, 'claimed_on_credit', False),
-                    'search_text': search_text,
-                    'customer_name': customer_name,
-                    'company_name': company_name,
-                })
-            except Exception as e:
-                app.logger.warning(f"Error building sale history entry: {str(e)}")
-                continue
-    except Exception as e:
-        app.logger.error(f"Error processing sales: {str(e)}")
-
-    try:
-        for d in devices:
-            try:
-                parts_qty = sum(p.qty for p in (d.parts_used_rows or [])) if d.parts_used_rows else 0
-                parts_text = ' '.join(
-                    f"{p.product.sku or ''} {p.product.name or ''}" for p in (d.parts_used_rows or []) if p.product
-                )
-                customer_name = ''
-                company_name = ''
-                if getattr(d, 'owner', None):
-                    customer_name = d.owner.name or ''
-                    company_name = d.owner.business_name or ''
-                # Prefer actual_completion as the 'created_at' for repair transactions when available
-                # Normalize `actual_completion` (Date) to a datetime so sorting between sales (datetime)
-                # and repairs (date) does not raise TypeError.
-                if d.actual_completion:
-                    # actual_completion is a date object (no time) --> convert to datetime at midnight
-                    try:
-                        from datetime import datetime as _dt, time as _time
-                        if isinstance(d.actual_completion, _dt):
-                            tx_date = d.actual_completion
-                        else:
-                            tx_date = _dt.combine(d.actual_completion, _dt.min.time())
-                    except Exception:
-                        # Fallback to created_at if anything unexpected
-                        tx_date = d.created_at
-                else:
-                    tx_date = d.created_at
-
-                search_text = f"{d.ticket_number or ''} {customer_name} {parts_text} {d.service_type or ''}"
-                
-                # Get latest payment date for repairs (use deposit_paid_at)
-                latest_payment_date = None
-                if d.deposit_paid and d.deposit_paid > 0 and d.deposit_paid_at:
-                    latest_payment_date = d.deposit_paid_at
-                
-                history.append({
-                    'type': 'repair',
-                    'invoice': d.ticket_number,
-                    'created_at': tx_date,
-                    'latest_payment_date': latest_payment_date,
-                    'items_count': parts_qty,
-                    'subtotal': float(d.total_cost or 0),
-                    'discount': 0.0,
-                    'total': float(d.total_cost or 0),
-                    'status': d.payment_status,
-                    'id': d.id,
-                    'balance_due': float(d.balance_due or 0),
-                    'payments_total': float((d.total_cost or 0) - (d.balance_due or 0)),
-                    'claimed_on_credit': getattr(d, 'claimed_on_credit', False),
-                    'search_text': search_text,
-                    'customer_name': customer_name,
-                    'company_name': company_name,
-                })
-            except Exception as e:
-                app.logger.warning(f"Error building device history entry: {str(e)}")
-                continue
-    except Exception as e:
-        app.logger.error(f"Error processing devices: {str(e)}")
-
-    # Sort by created_at desc and build a paginated result from the merged history.
-    try:
-        history_sorted = sorted(history, key=lambda x: x.get('created_at') or datetime.min, reverse=True)
-    except TypeError:
-        # Defensive fallback: if mixed/unexpected types remain, coerce to string timestamp and sort
-        app.logger.warning('Mixed date/datetime types detected when sorting history; applying fallback ordering.')
-        history_sorted = sorted(history, key=lambda x: str(x.get('created_at') or ''), reverse=True)
+        devices_filters.append(
+            or_(
+                Device.parts_used_rows.any(),
+                Device.total_cost > 0,
+                Device.claimed_on_credit == True
+            )
+        )
 
-    # Paginate the in-memory merged history so the UI treats it the same as other list views
-    page, per_page = get_page_args()
-    history_pagination = paginate_sequence(history_sorted, page=page, per_page=per_page)
+    history_pagination = _history_page(sales_filters, devices_filters, page, per_page)
 
-    # Credit summary for quick access (keep lightweight queries)
-    credits_q = Device.query.filter(Device.claimed_on_credit == True)
-    credits_count = credits_q.count()
-    credits_total = float(sum((d.balance_due or 0) for d in credits_q.limit(500).all()))
+    # Credit summary for quick access: count and outstanding total in one aggregate
+    credits_count, credits_total = db.session.execute(
+        select(func.count(Device.id), func.coalesce(func.sum(Device.balance_due), 0))
+        .where(Device.claimed_on_credit == True)
+    ).one()
+    credits_total = float(credits_total)
 
     return render_template("sales/sales_list.html", history=history_pagination, q=q, credits_count=credits_count, credits_total=credits_total)
 
@@ -563,92 +501,31 @@ def sales_list():
 @login_required
 @roles_required('ADMIN', 'SALES')
 def credits():
-    """List devices released on credit (outstanding claims)."""
-    devices = Device.query.filter(Device.claimed_on_credit == True).order_by(Device.created_at.desc()).all()
-    sales_on_credit = (
-        Sale.query
-        .options(joinedload(Sale.payments), joinedload(Sale.customer))  # type: ignore[arg-type]
-        .filter(Sale.claimed_on_credit == True)
-        .order_by(Sale.created_at.desc())
-        .all()
+    """List devices and sales released on credit (outstanding claims)."""
+    page, per_page = get_page_args()
+    history_pagination = _history_page(
+        [Sale.claimed_on_credit == True], [Device.claimed_on_credit == True], page, per_page
     )
 
-    history = []
-
-    # include repair device credits
-    for d in devices:
-        parts_qty = sum(p.qty for p in d.parts_used_rows) if d.parts_used_rows else 0
-        parts_text = ' '.join(
-            f"{p.product.sku or ''} {p.product.name or ''}" for p in d.parts_used_rows if p.product
-        )
-        search_text = f"{d.ticket_number or ''} {parts_text}"
-        cust_name = ''
-        comp_name = ''
-        if getattr(d, 'owner', None):
-            cust_name = d.owner.name or ''
-            comp_name = d.owner.business_name or ''
-        history.append({
-            'type': 'repair',
-            'invoice': d.ticket_number,
-            'created_at': d.created_at,
-            'items_count': parts_qty,
-            'subtotal': float(d.total_cost or 0),
-            'discount': 0.0,
-            'total': float(d.total_cost or 0),
-            'status': d.payment_status,
-            'id': d.id,
-            'balance_due': float(d.balance_due or 0),
-            'payments_total': float((d.total_cost or 0) - (d.balance_due or 0)),
-            'claimed_on_credit': True,
-            'search_text': search_text,
-            'customer_name': cust_name,
-            'company_name': comp_name,
-        })
-
-    # include sales on credit
-    for s in sales_on_credit:
-        items_count = sum(item.qty for item in s.items) if s.items else 0
-        parts_text = ' '.join(f"{item.product.sku or ''} {item.product.name or ''}" for item in s.items if item.product)
-        payments_total = sum((p.amount or 0) for p in (s.payments or []))
-        balance_due = float((s.total or 0) - payments_total)
-        search_text = f"{s.invoice_no or ''} {parts_text}"
-        cust_name = ''
-        comp_name = ''
-        if getattr(s, 'customer', None):
-            cust_name = s.customer.name or ''
-            comp_name = s.customer.business_name or ''
-        history.append({
-            'type': 'sale',
-            'invoice': s.invoice_no,
-            'created_at': s.created_at,
-            'items_count': items_count,
-            'subtotal': float(s.subtotal or 0),
-            'discount': float(s.discount or 0),
-            'total': float(s.total or 0),
-            'status': s.status,
-            'id': s.id,
-            'balance_due': balance_due,
-            'payments_total': payments_total,
-            'claimed_on_credit': True,
-            'search_text': search_text,
-            'customer_name': cust_name,
-            'company_name': comp_name,
-        })
-
-    # Total credits and paginate the in-memory history for consistent UI behavior
-    credits_count = len(history)
-    credits_total = 0.0
-    for d in devices:
-        credits_total += float(d.balance_due or 0)
-    for s in sales_on_credit:
-        credits_total += float((s.total or 0) - sum((p.amount or 0) for p in (s.payments or [])))
-
-    # Paginate the in-memory list so the sales_list template can rely on a Pagination object
-    page, per_page = get_page_args()
-    history_pagination = paginate_sequence(history, page=page, per_page=per_page)
+    # Outstanding total across every credit in one statement: repair balances
+    # plus each credited sale's total less its payments
+    sale_paid = (
+        select(func.coalesce(func.sum(SalePayment.amount), 0))
+        .where(SalePayment.sale_id == Sale.id)
+        .scalar_subquery()
+    )
+    credits_total = db.session.scalar(select(
+        select(func.coalesce(func.sum(Device.balance_due), 0))
+        .where(Device.claimed_on_credit == True).scalar_subquery()
+        + select(func.coalesce(func.sum(Sale.total - sale_paid), 0))
+        .where(Sale.claimed_on_credit == True).scalar_subquery()
+    ))
 
     # Render the same sales_list template but indicate credits_only to adjust header/UI
-    return render_template('sales/sales_list.html', history=history_pagination, q='', credits_only=True, credits_count=credits_count, credits_total=credits_total)
+    return render_template(
+        'sales/sales_list.html', history=history_pagination, q='', credits_only=True,
+        credits_count=history_pagination.total, credits_total=float(credits_total or 0),
+    )
 
 
 @sales_bp.route('/<int:sale_id>/payment', methods=['POST'])
@@ -656,8 +533,6 @@ def credits():
 @roles_required('ADMIN', 'SALES')
 def add_payment_for_sale(sale_id: int):
     """Record payment for a sale that was released on credit (quick-action from credits list)."""
-    sale = Sale.query.get_or_404(sale_id)
-
     amount = safe_decimal(request.form.get('amount'), '0.00')
     payment_method = request.form.get('payment_method', 'Unknown')
 
@@ -665,7 +540,22 @@ def add_payment_for_sale(sale_id: int):
         flash('Payment amount must be greater than 0.', 'danger')
         return redirect(url_for('sales.sales_list'))
 
-    payments_total = sum((p.amount or 0) for p in (sale.payments or []))
+    # Lock the sale row first (PostgreSQL/MySQL; SQLite already serializes
+    # writers), so concurrent payments on the same sale queue here. The paid
+    # total is read only after the lock is held, by a separate locking read:
+    # that sees payments committed by whoever held the lock before us, which a
+    # subquery inside the locking SELECT (read from its pre-wait snapshot) does not.
+    sale = db.session.execute(
+        select(Sale).where(Sale.id == sale_id).with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if sale is None:
+        abort(404)
+    payments_total = sum(db.session.scalars(
+        select(SalePayment.amount)
+        .where(SalePayment.sale_id == sale.id, SalePayment.amount.isnot(None))
+        .with_for_update()
+    ), Decimal("0.00"))
     remaining = (sale.total or 0) - payments_total
 
     if remaining <= 0:
@@ -751,6 +641,22 @@ def credit_claim(sale_id: int):
     )
 
 
+def _sale_item_descriptions(sale_ids):
+    """Map each sale id to its "qty×product, ..." description with one query"""
+    if not sale_ids:
+        return {}
+    parts = defaultdict(list)
+    rows = db.session.execute(
+        select(SaleItem.sale_id, SaleItem.qty, Product.name)
+        .outerjoin(Product, SaleItem.product_id == Product.id)
+        .where(SaleItem.sale_id.in_(sale_ids))
+        .order_by(SaleItem.sale_id, SaleItem.id)
+    )
+    for sale_id, qty, name in rows:
+        parts[sale_id].append(f"{qty}×{name if name is not None else 'Unknown'}")
+    return {sale_id: ", ".join(lines) for sale_id, lines in parts.items()}
+
+
 @sales_bp.route("/daily-sales")
 @login_required
 @roles_required("ADMIN", "SALES")
@@ -762,7 +668,7 @@ def daily_sales():
     today_date = datetime.now().date()
     if date_str:
         try:
-            selected_date = datetime.fromisoformat(date_str).date()
+            selected_date = date.fromisoformat(date_str)
         except Exception:
             selected_date = today_date
     else:
@@ -771,9 +677,11 @@ def daily_sales():
     if selected_date > today_date:
         return redirect(url_for('sales.daily_sales', date=today_date.isoformat()))
 
-    # bounds for datetime comparisons
+    # bounds for datetime comparisons; [start_dt, next_day) keeps the
+    # timestamp filters on bare columns so their indexes can be range-scanned
     start_dt = datetime.combine(selected_date, datetime.min.time())
     end_dt = datetime.combine(selected_date, datetime.max.time())
+    next_day = start_dt + timedelta(days=1)
 
     records = []
     total_payments = Decimal("0.00")
@@ -786,37 +694,53 @@ def daily_sales():
     # CRITICAL FIX: Removed fallback to Sale.created_at in filter
     # This prevents double-counting of transactions
     # Now only includes payments with actual paid_at timestamps
-    sale_payments = (
-        SalePayment.query
-        .join(Sale, SalePayment.sale_id == Sale.id)
-        .options(
-            joinedload(SalePayment.sale).joinedload(Sale.customer),  # type: ignore[arg-type]
-            joinedload(SalePayment.sale).joinedload(Sale.items).joinedload(SaleItem.product),  # type: ignore[arg-type]
-            joinedload(SalePayment.sale).joinedload(Sale.payments),  # type: ignore[arg-type]
+
+    # Each sale's paid-to-date figure (payments up to the end of the report day)
+    # comes back with its row from a correlated SUM. A window over the day's rows
+    # would miss earlier payments, and this avoids loading every Sale.payments.
+    prior = aliased(SalePayment)
+    paid_upto = (
+        select(func.coalesce(func.sum(prior.amount), 0))
+        .where(
+            prior.sale_id == Sale.id,
+            or_(prior.paid_at <= end_dt, and_(prior.paid_at.is_(None), Sale.created_at <= end_dt)),
         )
-        .filter(
-            SalePayment.paid_at.isnot(None),  # Strict: paid_at must be set
-            func.date(SalePayment.paid_at) == selected_date,
+        .correlate(Sale)
+        .scalar_subquery()
+    )
+    sale_payments = db.session.execute(
+        select(
+            SalePayment.id,
+            SalePayment.sale_id,
+            SalePayment.amount,
+            SalePayment.paid_at,
+            Sale.total,
+            Sale.status,
+            Customer.id.label("customer_id"),
+            Customer.name.label("customer_name"),
+            Customer.business_name,
+            paid_upto.label("paid_upto"),
+        )
+        .join(Sale, SalePayment.sale_id == Sale.id)
+        .outerjoin(Customer, Sale.customer_id == Customer.id)
+        .where(
+            SalePayment.paid_at >= start_dt,  # Strict: paid_at must be set (NULL fails the range)
+            SalePayment.paid_at < next_day,
             Sale.status.in_(['PAID', 'PARTIAL']),
         )
         .order_by(SalePayment.paid_at.desc(), SalePayment.id.desc())
-        .all()
-    )
+    ).all()
+    descriptions = _sale_item_descriptions({pay.sale_id for pay in sale_payments})
 
     for pay in sale_payments:
-        sale = pay.sale
-        if not sale:
-            continue
-
-        cust_obj = sale.customer
-        # ensure we have a simple string so template prints nicely
-        if cust_obj:
-            cust_name = cust_obj.display_name
+        # same text as Customer.display_name, without loading the Customer
+        if pay.customer_id is not None:
+            cust_name = pay.customer_name or pay.business_name or ""
         else:
             cust_name = 'Walk-in Customer'
 
         # Ignore cancelled/drafts if you use them
-        if (sale.status or "").upper() in ["VOID", "DRAFT"]:
+        if (pay.status or "").upper() in ["VOID", "DRAFT"]:
             continue
 
         amount = Decimal(pay.amount or 0)
@@ -826,27 +750,9 @@ def daily_sales():
                     f"Skipping invalid payment {pay.id}: amount={amount}, sale={pay.sale_id}"
                 )
                 continue  # Only include received payments (positive amounts)
-        desc = ""
-        if sale.items:
-            desc = ", ".join(
-                f"{it.qty}×{it.product.name if it.product else 'Unknown'}"
-                for it in sale.items
-            )
 
         # Determine if sale is still partial AFTER payments (overall state)
-        sale_total = Decimal(sale.total or 0)
-
-        def _payment_within_report(p):
-            paid_at = getattr(p, "paid_at", None)
-            sale_created_at = getattr(p.sale, "created_at", None) if getattr(p, 'sale', None) else None
-            if paid_at:
-                return paid_at <= end_dt
-            if sale_created_at:
-                return sale_created_at <= end_dt
-            return False
-
-        total_paid_upto = Decimal(sum((p.amount or 0) for p in (sale.payments or []) if _payment_within_report(p)))
-        is_partial = total_paid_upto < sale_total
+        is_partial = Decimal(pay.paid_upto or 0) < Decimal(pay.total or 0)
 
         if is_partial:
             partial_payment_count += 1
@@ -855,14 +761,14 @@ def daily_sales():
         total_payments += amount
 
         records.append({
-            "datetime": pay.paid_at or getattr(pay.sale, 'created_at', None),  # payment time (fallback to sale.created_at)
+            "datetime": pay.paid_at,
             "customer": cust_name,
             "type": "Purchase",
-            "description": desc,
+            "description": descriptions.get(pay.sale_id, ""),
             "amount": float(amount),  # amount received (deposit/partial/full)
             "payment_status": "PARTIAL" if is_partial else "PAID",
             "is_partial": is_partial,
-            "receipt_id": sale.id,
+            "receipt_id": pay.sale_id,
             "receipt_type": "sale",
         })
 
@@ -878,12 +784,12 @@ def daily_sales():
                 Device.actual_completion == selected_date,
                 and_(
                     Device.deposit_paid > 0,
-                    Device.deposit_paid_at.isnot(None),
-                    func.date(Device.deposit_paid_at) == selected_date,
+                    Device.deposit_paid_at >= start_dt,
+                    Device.deposit_paid_at < next_day,
                 ),
                 and_(
-                    Device.full_payment_at.isnot(None),
-                    func.date(Device.full_payment_at) == selected_date,
+                    Device.full_payment_at >= start_dt,
+                    Device.full_payment_at < next_day,
                 ),
             )
         )
@@ -993,17 +899,13 @@ def daily_sales():
     # CSV export
     fmt = request.args.get('format', 'html')
     if fmt == 'csv':
-        si = StringIO()
-        cw = csv.writer(si)
-        cw.writerow(["Date/Time", "Customer", "Type", "Description", "Amount", "Payment Status"])
-        for r in records:
-            dt = r['datetime']
-            dt_str = dt.strftime('%Y-%m-%d %H:%M:%S') if hasattr(dt, 'strftime') else str(dt)
-            cw.writerow([dt_str, r.get('customer',''), r.get('type',''), r.get('description',''), r.get('amount',0), r.get('payment_status','')])
-        output = si.getvalue()
-        return Response(output, mimetype='text/csv', headers={
-            'Content-Disposition': f'attachment; filename="daily_sales_{selected_date.isoformat()}.csv"'
-        })
+        def csv_rows():
+            yield "Date/Time,Customer,Type,Description,Amount,Payment Status\r\n"
+            for r in records:
+                dt = r['datetime']
+                dt_str = dt.strftime('%Y-%m-%d %H:%M:%S') if hasattr(dt, 'strftime') else str(dt)
+                yield csv_line((dt_str, r.get('customer', ''), r.get('type', ''), r.get('description', ''), r.get('amount', 0), r.get('payment_status', '')))
+        return small_csv_response(csv_rows(), f"daily_sales_{selected_date.isoformat()}.csv")
 
     return render_template(
         'sales/daily_sales.html',
@@ -1033,10 +935,11 @@ def reports():
     end_date = datetime.now().date()
 
     # Query sales within date range (used by KPI calculations and trends)
-    # eager load related items to prevent N+1 issues when iterating
+    # eager load related items to prevent N+1 issues when iterating; selectinload
+    # fetches them in one IN query rather than repeating each sale row per item
     # Include ALL sales (both regular and credit) for accurate item counts
     sales_period = (
-        Sale.query.options(joinedload(Sale.items).joinedload(SaleItem.product))  # type: ignore[arg-type]
+        Sale.query.options(selectinload(Sale.items).joinedload(SaleItem.product))  # type: ignore[arg-type]
         .filter(Sale.created_at >= start_datetime)
         .all()
     )
@@ -1044,6 +947,7 @@ def reports():
     # Query devices completed within date range (use actual_completion)
     repairs_period_devices = (
         Device.query
+        .options(selectinload(Device.parts_used_rows))  # type: ignore[arg-type]
         .filter(
             Device.actual_completion != None,
             Device.actual_completion >= start_date,
@@ -1206,19 +1110,24 @@ def daily_sales_cashflow():
         flash('Cannot select a future date for daily sales.', 'warning')
         selected = today
 
+    # the day as a [start, next day) range on the bare column, so paid_at's index is usable
+    start_dt = datetime.combine(selected, time.min)
+    on_day = (SalePayment.paid_at >= start_dt, SalePayment.paid_at < start_dt + timedelta(days=1))
+
     # query payments and eager-load related sale + customer to avoid N+1
     payments_q = (
         SalePayment.query
         .options(joinedload(SalePayment.sale).joinedload(Sale.customer))  # type: ignore[arg-type]
-        .filter(func.date(SalePayment.paid_at) == selected)
+        .filter(*on_day)
         .order_by(SalePayment.paid_at.desc())
     )
     payments = payments_q.all()
 
     # backend aggregate for total
-    total_amount = db.session.query(
-        func.coalesce(func.sum(SalePayment.amount), 0)
-    ).filter(func.date(SalePayment.paid_at) == selected).scalar()
+    total_amount = db.session.scalar(
+        select(func.coalesce(func.sum(SalePayment.amount), 0))
+        .where(*on_day)
+    )
     total_amount = float(total_amount or 0)
 
     # build entries for template
@@ -1420,8 +1329,10 @@ def revoke_sale_item(sale_id: int, item_id: int):
         sale.subtotal = new_subtotal
         sale.total = new_total
         
-        # Determine new status based on remaining balance
-        payments_total = sum((p.amount or 0) for p in (sale.payments or []))
+        # Determine new status based on remaining balance; only the sum is needed, not the rows
+        payments_total = db.session.scalar(
+            select(func.coalesce(func.sum(SalePayment.amount), 0)).where(SalePayment.sale_id == sale.id)
+        )
         if new_total <= 0:
             sale.status = 'VOID'  # if all items revoked, mark as void
         elif payments_total >= new_total:
@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional, List, Any, TYPE_CHECKING
+from sqlalchemy import event, text
 from app.extensions import db
 from app.models.base import BaseModel
 
@@ -94,6 +95,33 @@ class Device(BaseModel, db.Model):
     # Repair payments with cascade delete
     repair_payments = db.relationship("RepairPayment", cascade="all, delete-orphan", lazy=True)
 
+    @property
+    def days_in_shop(self) -> int:
+        """Whole days since the device was received (0 when no received date)."""
+        return (date.today() - self.received_date).days if self.received_date else 0
+
+
+# Duplicate-ticket probes in add_repair: open tickets by serial, and recent similar tickets
+db.Index(
+    "ix_device_open_serial",
+    Device.customer_id,
+    Device.serial_number,
+    postgresql_where=(Device.status != "Completed"),
+    sqlite_where=(Device.status != "Completed"),
+)
+db.Index("ix_device_recent_similar", Device.customer_id, Device.device_type, Device.created_at)
+
+# Report aggregates: repairs by status over a received-date range, repairs invoiced
+# over a completion-date range and the pending-repairs total. Each index also
+# carries the summed columns.
+db.Index("ix_device_received_status", Device.received_date, Device.status, Device.total_cost)
+db.Index("ix_device_completion_total", Device.actual_completion, Device.total_cost)
+db.Index("ix_device_payment_status", Device.payment_status, Device.total_cost, Device.balance_due)
+
+# Daily sales report: repairs with a deposit or final payment in the day's timestamp range
+db.Index("ix_device_deposit_paid_at", Device.deposit_paid_at)
+db.Index("ix_device_full_payment_at", Device.full_payment_at)
+
 
 class Technician(BaseModel, db.Model):
     __tablename__ = "technician"
@@ -122,7 +150,7 @@ class RepairPartUsed(BaseModel, db.Model):
     __tablename__ = "repair_part_used"
 
     id = db.Column(db.Integer, primary_key=True)
-    device_id = db.Column(db.Integer, db.ForeignKey("device.id"), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey("device.id"), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
 
     qty = db.Column(db.Integer, nullable=False)
@@ -131,4 +159,55 @@ class RepairPartUsed(BaseModel, db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    product = db.relationship("Product")
\ No newline at end of file
+    product = db.relationship("Product")
+
+
+# ---------------------------------------------------------------------------
+# device.parts_cost is maintained by the database: any insert/update/delete on
+# repair_part_used re-sums the affected device's line totals (indexed on device_id).
+# ---------------------------------------------------------------------------
+
+_RESUM_PARTS_COST = (
+    "UPDATE device SET parts_cost = ("
+    "SELECT COALESCE(SUM(line_total), 0) FROM repair_part_used WHERE device_id = {row}.device_id"
+    ") WHERE id = {row}.device_id"
+)
+
+_SQLITE_PARTS_COST_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS trg_repair_part_used_ins AFTER INSERT ON repair_part_used "
+    f"BEGIN {_RESUM_PARTS_COST.format(row='NEW')}; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_repair_part_used_upd AFTER UPDATE ON repair_part_used "
+    f"BEGIN {_RESUM_PARTS_COST.format(row='OLD')}; {_RESUM_PARTS_COST.format(row='NEW')}; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_repair_part_used_del AFTER DELETE ON repair_part_used "
+    f"BEGIN {_RESUM_PARTS_COST.format(row='OLD')}; END",
+)
+
+_POSTGRES_PARTS_COST_TRIGGERS = (
+    "CREATE OR REPLACE FUNCTION repair_part_used_parts_cost() RETURNS trigger AS $$ "
+    "BEGIN "
+    "IF TG_OP IN ('UPDATE', 'DELETE') THEN " + _RESUM_PARTS_COST.format(row='OLD') + "; END IF; "
+    "IF TG_OP IN ('INSERT', 'UPDATE') THEN " + _RESUM_PARTS_COST.format(row='NEW') + "; END IF; "
+    "RETURN NULL; "
+    "END; $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS trg_repair_part_used_parts_cost ON repair_part_used",
+    "CREATE TRIGGER trg_repair_part_used_parts_cost AFTER INSERT OR UPDATE OR DELETE ON repair_part_used "
+    "FOR EACH ROW EXECUTE FUNCTION repair_part_used_parts_cost()",
+)
+
+
+def ensure_parts_cost_triggers(connection) -> None:
+    """Install the repair_part_used -> device.parts_cost triggers (idempotent)."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        statements = _SQLITE_PARTS_COST_TRIGGERS
+    elif dialect == "postgresql":
+        statements = _POSTGRES_PARTS_COST_TRIGGERS
+    else:
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+@event.listens_for(RepairPartUsed.__table__, "after_create")
+def _create_parts_cost_triggers(target, connection, **kw):
+    ensure_parts_cost_triggers(connection)
@@ -44,6 +44,10 @@ class RepairPayment(db.Model):
         return f"<RepairPayment device={self.device_id} amount={self.amount} date={self.paid_at}>"
 
 
+# The financial summary filters on date(paid_at) and sums the amount
+db.Index("ix_repair_payment_paid_day", db.func.date(RepairPayment.paid_at), RepairPayment.amount)
+
+
 # Migration notes:
 # 1. Create new repair_payment table
 # 2. Run data migration:
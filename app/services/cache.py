@@ -0,0 +1,56 @@
+"""
+Small in-process caches for hot read paths
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    `invalidate()` bumps a generation counter that is mixed into every key,
+    so all cached entries become unreachable at once without walking the
+    store; stale generations simply age out of the LRU.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data = OrderedDict()  # {(generation, key): (expires_at, value)}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if missing/expired"""
+        now = time.monotonic()
+        with self._lock:
+            full_key = (self.generation, key)
+            entry = self._data.get(full_key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[full_key]
+                return default
+            self._data.move_to_end(full_key)
+            return value
+
+    def set(self, key, value):
+        """Store `value` under `key` for `ttl` seconds, evicting the LRU entry if full"""
+        with self._lock:
+            full_key = (self.generation, key)
+            self._data[full_key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(full_key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached entry by moving to a new generation"""
+        with self._lock:
+            self.generation += 1
+
+    def clear(self):
+        """Remove all entries and reset storage"""
+        with self._lock:
+            self._data.clear()
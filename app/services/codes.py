@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
+
+from sqlalchemy import func
+
+from app.extensions import db
 from app.models.customer import Customer
 from app.models.repair import Device
 from app.models.sales import Sale
@@ -11,33 +15,39 @@ def generate_customer_code() -> str:
 
     - Ignores customer rows whose `customer_code` doesn't start with `JC-CUST-`.
     - Safely parses the numeric suffix and returns max+1.
-    - Verifies the candidate isn't already present (simple retry loop).
+    - Verifies the candidate isn't already present only when the existing
+      codes are irregular (unparseable suffixes), so the common path is a
+      single column-only query.
     """
-    # Prefer the highest `JC-CUST-` value; fall back to scanning all matching codes.
-    last = (
-        Customer.query
+    # Longest-then-highest code is the numeric max for zero-padded suffixes
+    # (plain string order would put JC-CUST-999 after JC-CUST-1000).
+    last_code = (
+        db.session.query(Customer.customer_code)
         .filter(Customer.customer_code.like('JC-CUST-%'))
-        .order_by(Customer.customer_code.desc())
-        .first()
+        .order_by(func.length(Customer.customer_code).desc(), Customer.customer_code.desc())
+        .limit(1)
+        .scalar()
     )
 
-    if last:
+    if last_code is None:
+        return "JC-CUST-001"
+
+    try:
+        return f"JC-CUST-{int(last_code.rsplit('-', 1)[1]) + 1:03d}"
+    except Exception:
+        pass
+
+    # Defensive: scan all matching codes and compute max numeric suffix
+    matches = Customer.query.with_entities(Customer.customer_code).filter(Customer.customer_code.like('JC-CUST-%')).all()
+    max_n = 0
+    for (code,) in matches:
         try:
-            n = int(last.customer_code.rsplit('-', 1)[1]) + 1
+            num = int(code.rsplit('-', 1)[1])
+            if num > max_n:
+                max_n = num
         except Exception:
-            # Defensive: scan all matching codes and compute max numeric suffix
-            matches = Customer.query.with_entities(Customer.customer_code).filter(Customer.customer_code.like('JC-CUST-%')).all()
-            max_n = 0
-            for (code,) in matches:
-                try:
-                    num = int(code.rsplit('-', 1)[1])
-                    if num > max_n:
-                        max_n = num
-                except Exception:
-                    continue
-            n = max_n + 1
-    else:
-        n = 1
+            continue
+    n = max_n + 1
 
     # Ensure uniqueness (handle rare race/edge cases by incrementing until free)
     candidate = f"JC-CUST-{n:03d}"
@@ -50,13 +60,15 @@ def generate_customer_code() -> str:
 
 def generate_ticket_number() -> str:
     year = datetime.now().year
-    last = (
-        Device.query.filter(Device.ticket_number.like(f"JC-{year}-%"))
+    last_ticket = (
+        db.session.query(Device.ticket_number)
+        .filter(Device.ticket_number.like(f"JC-{year}-%"))
         .order_by(Device.id.desc())
-        .first()
+        .limit(1)
+        .scalar()
     )
-    if last:
-        n = int(last.ticket_number.split("-")[-1]) + 1
+    if last_ticket:
+        n = int(last_ticket.split("-")[-1]) + 1
     else:
         n = 1
     return f"JC-{year}-{n:03d}"
@@ -64,13 +76,15 @@ def generate_ticket_number() -> str:
 
 def generate_invoice_no() -> str:
     year = datetime.now().year
-    last = (
-        Sale.query.filter(Sale.invoice_no.like(f"INV-{year}-%"))
+    last_invoice = (
+        db.session.query(Sale.invoice_no)
+        .filter(Sale.invoice_no.like(f"INV-{year}-%"))
         .order_by(Sale.id.desc())
-        .first()
+        .limit(1)
+        .scalar()
     )
-    if last:
-        n = int(last.invoice_no.split("-")[-1]) + 1
+    if last_invoice:
+        n = int(last_invoice.split("-")[-1]) + 1
     else:
         n = 1
     return f"INV-{year}-{n:05d}"
\ No newline at end of file
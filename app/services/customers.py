@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Any, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.customer import Customer
+from app.services.cache import TTLCache
+from app.services.codes import generate_customer_code
+
+# phone -> customer id; ids only, so no ORM instance outlives its session
+_PHONE_CACHE = TTLCache(maxsize=2048, ttl=60)
+
+
+def find_customer_by_phone(phone: str) -> Customer | None:
+    """Return the customer with ``phone``, resolving cached ids through the identity map."""
+    customer_id = _PHONE_CACHE.get(phone)
+    if customer_id is not None:
+        customer = db.session.get(Customer, customer_id)
+        # Guard against a phone edited or a customer deleted since caching
+        if customer is not None and customer.phone == phone:
+            return customer
+
+    customer = Customer.query.filter_by(phone=phone).first()
+    if customer is not None:
+        _PHONE_CACHE.set(phone, customer.id)
+    return customer
+
+
+def get_or_create_customer_by_phone(phone: str, attempts: int = 3, **fields: Any) -> Tuple[Customer, bool]:
+    """Return ``(customer, created)`` for ``phone``, inserting a new row if none exists.
+
+    The insert runs inside a SAVEPOINT so a concurrent request that takes the
+    same generated ``customer_code`` only rolls back this probe, not the
+    caller's whole transaction.  On conflict the phone is looked up again and,
+    if still missing, a fresh customer code is generated and the insert retried;
+    the last IntegrityError is re-raised once ``attempts`` run out.
+
+    ``customer.phone`` has no unique constraint, so two concurrent requests
+    for a new phone can still both insert a customer with it.
+    """
+    customer = find_customer_by_phone(phone)
+    if customer:
+        return customer, False
+
+    for attempt in range(attempts):
+        customer = Customer(customer_code=generate_customer_code(), phone=phone, **fields)
+        try:
+            with db.session.begin_nested():
+                db.session.add(customer)
+        except IntegrityError:
+            # Savepoint already rolled back; check whether another writer created the phone
+            existing = find_customer_by_phone(phone)
+            if existing:
+                return existing, False
+            if attempt == attempts - 1:
+                raise
+            continue
+        _PHONE_CACHE.set(phone, customer.id)
+        return customer, True
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.repair import Device
+
+
+def update_device_and_return(device_id: int, *returning: Any, where: tuple = (), **fields: Any):
+    """Apply ``fields`` to one device in a single ``UPDATE ... RETURNING``.
+
+    Skips the SELECT that ``get_or_404`` + attribute assignment would issue.
+    Extra ``where`` criteria act as guards (e.g. "not already paid"); the
+    returned row is ``None`` when the device is missing or a guard fails.
+    ``returning`` defaults to the device id.
+    """
+    stmt = (
+        update(Device)
+        .where(Device.id == device_id, *where)
+        .values(**fields)
+        .returning(*(returning or (Device.id,)))
+    )
+    return db.session.execute(stmt).first()
@@ -22,11 +22,13 @@ Formulas:
 
 from __future__ import annotations
 
+import logging
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Tuple, Optional, Any
 
-from sqlalchemy import func, and_, or_
+from sqlalchemy import Date, bindparam, case, func, and_, or_, select
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import joinedload
 
 from app.extensions import db
@@ -35,6 +37,106 @@ from app.models.repair import Device, RepairPartUsed
 from app.models.repair_payment import RepairPayment
 from app.models.customer import Customer
 
+logger = logging.getLogger(__name__)
+
+
+def _sum(expr):
+    """SUM(expr) that yields 0 instead of NULL when no rows match"""
+    return func.coalesce(func.sum(expr), 0)
+
+
+def _build_period_totals_stmt():
+    """Build the fused SELECT behind get_period_totals, with the period as bind parameters."""
+    start = bindparam('start_date', type_=Date)
+    end = bindparam('end_date', type_=Date)
+
+    sales_payment_filter = and_(
+        func.date(SalePayment.paid_at) >= start,
+        func.date(SalePayment.paid_at) <= end,
+        SalePayment.amount > 0,
+        Sale.status.in_(['PAID', 'PARTIAL']),
+        ~Sale.claimed_on_credit,
+    )
+    repair_payment_filter = and_(
+        func.date(RepairPayment.paid_at) >= start,
+        func.date(RepairPayment.paid_at) <= end,
+        RepairPayment.amount > 0,
+    )
+    sales_invoiced_filter = and_(
+        func.date(Sale.created_at) >= start,
+        func.date(Sale.created_at) <= end,
+        Sale.status.in_(['PAID', 'PARTIAL']),
+        ~Sale.claimed_on_credit,
+        Sale.total > 0,
+    )
+    repairs_invoiced_filter = and_(
+        Device.actual_completion.isnot(None),
+        Device.actual_completion >= start,
+        Device.actual_completion <= end,
+        ~Device.claimed_on_credit,
+        ~Device.charge_waived,
+        Device.total_cost > 0,
+    )
+
+    # Per-sale payment totals for the outstanding breakdown
+    paid = (
+        select(
+            SalePayment.sale_id.label('sale_id'),
+            func.sum(SalePayment.amount).label('paid'),
+            func.count(SalePayment.id).label('payment_count'),
+        )
+        .group_by(SalePayment.sale_id)
+        .subquery()
+    )
+    payment_count = func.coalesce(paid.c.payment_count, 0)
+    sale_balance = func.coalesce(Sale.total, 0) - func.coalesce(paid.c.paid, 0)
+    open_partial = and_(Sale.status == 'PARTIAL', ~Sale.claimed_on_credit)
+
+    def scalar(*columns, from_=None, where=None):
+        stmt = select(*columns)
+        if from_ is not None:
+            stmt = stmt.select_from(from_)
+        if where is not None:
+            stmt = stmt.where(where)
+        return stmt.scalar_subquery()
+
+    sales_payments = SalePayment.__table__.join(Sale.__table__, SalePayment.sale_id == Sale.id)
+    sales_with_paid = Sale.__table__.outerjoin(paid, paid.c.sale_id == Sale.id)
+
+    return select(
+        scalar(_sum(SalePayment.amount), from_=sales_payments, where=sales_payment_filter).label('sales_received'),
+        scalar(func.count(SalePayment.id), from_=sales_payments, where=sales_payment_filter).label('sales_payment_count'),
+        scalar(_sum(RepairPayment.amount), where=repair_payment_filter).label('repairs_received'),
+        scalar(func.count(RepairPayment.id), where=repair_payment_filter).label('repair_payment_count'),
+        scalar(_sum(Sale.total), where=sales_invoiced_filter).label('sales_invoiced'),
+        scalar(func.count(Sale.id), where=sales_invoiced_filter).label('sales_invoice_count'),
+        scalar(_sum(Device.total_cost), where=repairs_invoiced_filter).label('repairs_invoiced'),
+        scalar(func.count(Device.id), where=repairs_invoiced_filter).label('repairs_invoice_count'),
+        scalar(
+            _sum(case((and_(open_partial, payment_count == 0), func.coalesce(Sale.total, 0)), else_=0)),
+            from_=sales_with_paid,
+        ).label('pending_sales'),
+        scalar(
+            _sum(case(
+                (and_(or_(and_(open_partial, payment_count > 0), Sale.claimed_on_credit == True), sale_balance > 0), sale_balance),
+                else_=0,
+            )),
+            from_=sales_with_paid,
+        ).label('sales_balance_due'),
+        scalar(_sum(Device.total_cost), where=Device.payment_status == 'Pending').label('pending_repairs'),
+        # Partial and credit repairs are summed independently (a row matching both counts twice)
+        scalar(
+            _sum(
+                case((Device.payment_status == 'Partial', func.coalesce(Device.balance_due, 0)), else_=0)
+                + case((Device.claimed_on_credit == True, func.coalesce(Device.balance_due, 0)), else_=0)
+            ),
+        ).label('repairs_balance_due'),
+    )
+
+
+# Built once per process so SQLAlchemy reuses the same construct (and its compiled SQL)
+_PERIOD_TOTALS_STMT = _build_period_totals_stmt()
+
 
 class FinancialReconciliation:
     """
@@ -232,8 +334,8 @@ class FinancialReconciliation:
             Device.query
             .filter(
                 Device.actual_completion.isnot(None),
-                func.date(Device.actual_completion) >= start_date,
-                func.date(Device.actual_completion) <= end_date,
+                Device.actual_completion >= start_date,
+                Device.actual_completion <= end_date,
                 ~Device.claimed_on_credit,
                 ~Device.charge_waived,
             )
@@ -456,6 +558,65 @@ class FinancialReconciliation:
         
         return breakdown
 
+    @staticmethod
+    def get_period_totals(start_date: date, end_date: date) -> Dict[str, Any]:
+        """
+        Get every scalar total the financial summary needs in ONE round-trip.
+
+        Each figure is a scalar subquery with exactly the filters used by
+        get_sales_revenue_received, get_repair_revenue_received,
+        get_revenue_invoiced and get_outstanding_by_status, so the results
+        match those methods without loading or itemizing any rows.
+
+        Returns: {
+            'sales_received', 'sales_payment_count',
+            'repairs_received', 'repair_payment_count',
+            'sales_invoiced', 'repairs_invoiced', 'invoice_count',
+            'pending_sales', 'sales_balance_due',
+            'pending_repairs', 'repairs_balance_due',
+        } with Decimal amounts and int counts.
+        """
+        zero = Decimal("0.00")
+
+        row = db.session.execute(
+            _PERIOD_TOTALS_STMT, {'start_date': start_date, 'end_date': end_date}
+        ).one()
+
+        def money(value) -> Decimal:
+            return Decimal(str(value or 0)).quantize(zero)
+
+        return {
+            'sales_received': money(row.sales_received),
+            'sales_payment_count': int(row.sales_payment_count or 0),
+            'repairs_received': money(row.repairs_received),
+            'repair_payment_count': int(row.repair_payment_count or 0),
+            'sales_invoiced': money(row.sales_invoiced),
+            'repairs_invoiced': money(row.repairs_invoiced),
+            'invoice_count': int(row.sales_invoice_count or 0) + int(row.repairs_invoice_count or 0),
+            'pending_sales': money(row.pending_sales),
+            'sales_balance_due': money(row.sales_balance_due),
+            'pending_repairs': money(row.pending_repairs),
+            'repairs_balance_due': money(row.repairs_balance_due),
+        }
+
+    @staticmethod
+    def _itemized_period_totals(start_date: date, end_date: date) -> Dict[str, Any]:
+        """Same shape as get_period_totals, computed by the row-loading methods."""
+        sales_received, sales_count, _ = FinancialReconciliation.get_sales_revenue_received(start_date, end_date)
+        repairs_received, repairs_count, _ = FinancialReconciliation.get_repair_revenue_received(start_date, end_date)
+        sales_invoiced, repairs_invoiced, invoice_records = FinancialReconciliation.get_revenue_invoiced(start_date, end_date)
+        outstanding = FinancialReconciliation.get_outstanding_by_status()
+        return {
+            'sales_received': sales_received,
+            'sales_payment_count': sales_count,
+            'repairs_received': repairs_received,
+            'repair_payment_count': repairs_count,
+            'sales_invoiced': sales_invoiced,
+            'repairs_invoiced': repairs_invoiced,
+            'invoice_count': len(invoice_records),
+            **outstanding,
+        }
+
     @staticmethod
     def generate_financial_summary(start_date: date, end_date: date) -> Dict[str, Any]:
         """
@@ -470,18 +631,31 @@ class FinancialReconciliation:
         - Outstanding breakdown
         - Reconciliation checks
         """
-        # Revenue RECEIVED (cash position)
-        revenue_received, revenue_count, payment_records = FinancialReconciliation.get_total_revenue_received(start_date, end_date)
-        
+        try:
+            # SAVEPOINT: a failed query must not roll back the caller's pending work
+            with db.session.begin_nested():
+                totals = FinancialReconciliation.get_period_totals(start_date, end_date)
+        except (OperationalError, ProgrammingError) as e:
+            # e.g. RepairPayment table missing on a legacy database: fall back to
+            # the itemizing methods, which know how to use Device deposits instead
+            logger.warning(f"Fused period totals failed, using itemized totals: {e}")
+            totals = FinancialReconciliation._itemized_period_totals(start_date, end_date)
+
+        sales_received = totals['sales_received']
+        repairs_received = totals['repairs_received']
+        revenue_received = sales_received + repairs_received
+        revenue_count = totals['sales_payment_count'] + totals['repair_payment_count']
+
         # Revenue INVOICED (accrual position)
-        sales_invoiced, repairs_invoiced, invoice_records = FinancialReconciliation.get_revenue_invoiced(start_date, end_date)
-        
+        sales_invoiced = totals['sales_invoiced']
+        repairs_invoiced = totals['repairs_invoiced']
+
         # Get breakdown
         payment_breakdown = FinancialReconciliation.get_payment_breakdown(start_date, end_date)
-        
+
         # Get all outstanding
-        outstanding = FinancialReconciliation.get_outstanding_by_status()
-        
+        outstanding = totals
+
         # Calculate total outstanding (sum all categories)
         total_outstanding = (
             outstanding['pending_sales'] +
@@ -499,8 +673,8 @@ class FinancialReconciliation:
             # Cash Position
             'revenue_received': {
                 'total': float(revenue_received),
-                'sales': float(FinancialReconciliation.get_sales_revenue_received(start_date, end_date)[0]),
-                'repairs': float(FinancialReconciliation.get_repair_revenue_received(start_date, end_date)[0]),
+                'sales': float(sales_received),
+                'repairs': float(repairs_received),
                 'transaction_count': revenue_count,
             },
             
@@ -509,7 +683,7 @@ class FinancialReconciliation:
                 'total': float(total_invoiced),
                 'sales': float(sales_invoiced),
                 'repairs': float(repairs_invoiced),
-                'invoice_count': len(invoice_records),
+                'invoice_count': totals['invoice_count'],
             },
             
             # Accounts Receivable (reconciliation check)
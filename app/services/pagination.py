@@ -72,3 +72,39 @@ def paginate_sequence(seq, page: int, per_page: int):
     end = start + per_page
     items = seq[start:end]
     return Pagination(items=items, page=page, per_page=per_page, total=total)
+
+
+class KeysetPage(SimpleNamespace):
+    """Seek-pagination page: no COUNT(*) and no OFFSET scan.
+
+    Attributes expected by templates:
+      - items, per_page, has_next, next_cursor, after
+    Iterating the page yields its items, like Flask-SQLAlchemy's Pagination.
+    """
+
+    def __init__(self, items, per_page: int, has_next: bool, next_cursor=None, after=None):
+        super().__init__(items=items, per_page=per_page, has_next=has_next,
+                         next_cursor=next_cursor, after=after)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, column, after=None, per_page: int = DEFAULT_PER_PAGE):
+    """Return a descending KeysetPage of `query` ordered by `column`.
+
+    Fetches one extra row as the has-next sentinel; the last returned row's
+    `column` value is the cursor for the following page (`column < cursor`).
+    """
+    if per_page <= 0:
+        per_page = DEFAULT_PER_PAGE
+    if after is not None:
+        query = query.filter(column < after)
+    rows = query.order_by(column.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = getattr(items[-1], column.key) if has_next and items else None
+    return KeysetPage(items=items, per_page=per_page, has_next=has_next, next_cursor=next_cursor, after=after)
@@ -0,0 +1,83 @@
+"""
+Cached product option lists for dropdowns
+"""
+from app.extensions import db
+from app.models.inventory import Product
+from app.services.cache import TTLCache
+from app.services.responses import script_json
+from app.services.write_tracker import invalidate_on_commit
+
+# Single entry: the active, non-service parts offered in the repair "add part" dropdown;
+# dropped whenever a Product write is committed, like the POS list below
+_PART_OPTIONS_CACHE = TTLCache(maxsize=1, ttl=60)
+
+# Single entry: the POS product list and its serialized JSON. Stock levels change
+# with every sale, so this is dropped whenever a Product write is committed.
+_POS_PRODUCTS_CACHE = TTLCache(maxsize=1, ttl=60)
+
+
+def get_part_options():
+    """Return ``(id, name, sell_price)`` rows for every active, non-service product.
+
+    Rows are plain tuples rather than ORM instances, so they are safe to share
+    across requests and sessions.
+    """
+    options = _PART_OPTIONS_CACHE.get("parts")
+    if options is None:
+        options = (
+            db.session.query(Product.id, Product.name, Product.sell_price)
+            .filter_by(is_active=True, is_service=False)
+            .order_by(Product.name)
+            .all()
+        )
+        _PART_OPTIONS_CACHE.set("parts", options)
+    return options
+
+
+def invalidate_part_options():
+    """Forget the cached part list (done automatically after any Product write commits)"""
+    _PART_OPTIONS_CACHE.invalidate()
+
+
+def get_pos_products():
+    """Return ``(products, products_data)`` for the POS page.
+
+    ``products`` is a list of plain dicts for the product dropdown and
+    ``products_data`` the same list serialized by ``script_json``; both are
+    built from a column-only query and shared across requests.
+    """
+    cached = _POS_PRODUCTS_CACHE.get("pos")
+    if cached is None:
+        rows = (
+            db.session.query(
+                Product.id, Product.name, Product.sku, Product.sell_price,
+                Product.stock_on_hand, Product.is_service,
+            )
+            .filter_by(is_active=True)
+            .order_by(Product.name)
+            .all()
+        )
+        products = [{
+            "id": id_,
+            "name": name,
+            "sku": sku,
+            "sell_price": float(sell_price),
+            "stock_on_hand": stock_on_hand,
+            "is_service": is_service,
+        } for id_, name, sku, sell_price, stock_on_hand, is_service in rows]
+        cached = (products, script_json(products))
+        _POS_PRODUCTS_CACHE.set("pos", cached)
+    return cached
+
+
+def invalidate_pos_products():
+    """Forget the cached POS product list"""
+    _POS_PRODUCTS_CACHE.invalidate()
+
+
+def _invalidate_product_lists():
+    invalidate_pos_products()
+    invalidate_part_options()
+
+
+invalidate_on_commit((Product,), _invalidate_product_lists)
@@ -0,0 +1,41 @@
+"""
+Short-lived cache for report aggregates
+"""
+from app.models.inventory import Category, Product
+from app.models.repair import Device
+from app.models.repair_payment import RepairPayment
+from app.models.sales import Sale, SaleItem, SalePayment
+from app.services.cache import TTLCache
+from app.services.write_tracker import invalidate_on_commit
+
+# Admin dashboards are refreshed repeatedly; a minute of staleness is invisible there
+_REPORT_CACHE = TTLCache(maxsize=64, ttl=60)
+
+# Writes to any of these can change a report figure
+_REPORT_MODELS = (Sale, SaleItem, SalePayment, Device, RepairPayment, Product, Category)
+
+
+def get_report(key, compute):
+    """Return the cached result for `key`, calling `compute()` on a miss.
+
+    Results are shared across requests, so `compute` must return plain rows,
+    dicts or lists rather than session-bound ORM instances.
+    """
+    result = _REPORT_CACHE.get(key)
+    if result is None:
+        result = compute()
+        _REPORT_CACHE.set(key, result)
+    return result
+
+
+def report_generation():
+    """Counter that changes whenever cached reports are invalidated"""
+    return _REPORT_CACHE.generation
+
+
+def invalidate_reports():
+    """Forget every cached report result"""
+    _REPORT_CACHE.invalidate()
+
+
+invalidate_on_commit(_REPORT_MODELS, invalidate_reports)
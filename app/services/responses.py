@@ -0,0 +1,61 @@
+"""
+Fast JSON responses for hot AJAX endpoints
+"""
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from markupsafe import Markup
+
+# Same escapes as Jinja's ``tojson`` filter, so the JSON cannot close a <script> tag
+_HTML_UNSAFE = ((b"<", b"\\u003c"), (b">", b"\\u003e"), (b"&", b"\\u0026"), (b"'", b"\\u0027"))
+
+
+def dumps(payload) -> bytes:
+    """Serialize ``payload`` with orjson; Decimals and other unknown types become strings"""
+    return orjson.dumps(payload, default=str)
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """Return ``payload`` as an ``application/json`` response.
+
+    Unlike ``jsonify`` this skips Flask's pure-Python encoder, so currency
+    values can be passed as ``Decimal`` and are emitted as strings.
+    """
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def script_json(payload) -> Markup:
+    """Serialize ``payload`` for embedding in a ``<script type="application/json">`` block.
+
+    A drop-in for ``{{ payload | tojson }}`` that uses orjson instead of the
+    stdlib encoder, for large lists rendered on every page load.
+    """
+    data = dumps(payload)
+    for char, escape in _HTML_UNSAFE:
+        data = data.replace(char, escape)
+    return Markup(data.decode("utf-8"))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, used by ``jsonify``, ``request.get_json`` and ``tojson``.
+
+    Types orjson cannot encode, and dates (kept in Flask's HTTP-date format),
+    fall back to ``DefaultJSONProvider.default``, so output matches the stock
+    provider apart from whitespace.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        # Hooks such as the session serializer's object_hook need the stdlib decoder
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
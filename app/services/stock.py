@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from sqlalchemy import bindparam, case, insert, update
+
 from app.extensions import db
 from app.models.inventory import Product, StockMovement
 
@@ -25,6 +27,51 @@ def stock_in(product: Product, qty: int, notes: str = "", reference_type: str =
     ))
 
 
+def stock_in_many(lines: list[tuple[int, int]], notes: str = "", reference_type: str = "MANUAL", reference_id: int = None) -> None:
+    """Stock-in several (product_id, qty) lines with one UPDATE executemany and one bulk movement insert.
+
+    Service items and non-positive quantities are skipped (stock_in would reject them).
+    In-session Product instances are not refreshed; commit or expire before reading stock_on_hand.
+    """
+    lines = [(pid, qty) for pid, qty in lines if qty > 0]
+    if not lines:
+        return
+
+    stockable = {
+        pid for (pid,) in db.session.query(Product.id)
+        .filter(Product.id.in_({pid for pid, _ in lines}), Product.is_service == False)
+    }
+    lines = [(pid, qty) for pid, qty in lines if pid in stockable]
+    if not lines:
+        return
+
+    totals: dict[int, int] = {}
+    for pid, qty in lines:
+        totals[pid] = totals.get(pid, 0) + qty
+
+    product_table = Product.__table__
+    db.session.execute(
+        update(product_table)
+        .where(product_table.c.id == bindparam("pid"))
+        .values(stock_on_hand=product_table.c.stock_on_hand + bindparam("delta")),
+        [{"pid": pid, "delta": qty} for pid, qty in totals.items()],
+    )
+    db.session.execute(
+        insert(StockMovement),
+        [
+            {
+                "product_id": pid,
+                "movement_type": "IN",
+                "qty": qty,
+                "reference_type": reference_type,
+                "reference_id": reference_id,
+                "notes": notes,
+            }
+            for pid, qty in lines
+        ],
+    )
+
+
 def adjust_stock(product: Product, delta: int, notes: str = "") -> None:
     """Adjust stock by positive or negative delta and record an ADJUST movement."""
     if delta == 0:
@@ -63,4 +110,62 @@ def stock_out(product: Product, qty: int, reference_type: str, reference_id: int
         reference_type=reference_type,
         reference_id=reference_id,
         notes=notes,
-    ))
\ No newline at end of file
+    ))
+
+
+def stock_out_many(lines: list[tuple[int, int]], reference_type: str, reference_id: int | None, notes: str = "") -> None:
+    """Stock-out several (product_id, qty) lines with one UPDATE and one bulk movement insert.
+
+    Service items are skipped (stock_out ignores them). The UPDATE only
+    decrements while every product still has enough stock, so a concurrent
+    sale cannot drive stock negative; on any shortage StockError is raised
+    and the caller must roll back. In-session Product instances are not
+    refreshed; commit or expire before reading stock_on_hand.
+    """
+    if not lines:
+        return
+    if any(qty <= 0 for _, qty in lines):
+        raise StockError("Quantity must be greater than 0.")
+
+    stockable = {
+        pid: (name, stock_on_hand) for pid, name, stock_on_hand in db.session.query(
+            Product.id, Product.name, Product.stock_on_hand
+        ).filter(Product.id.in_({pid for pid, _ in lines}), Product.is_service == False)
+    }
+    lines = [(pid, qty) for pid, qty in lines if pid in stockable]
+    if not lines:
+        return
+
+    totals: dict[int, int] = {}
+    for pid, qty in lines:
+        totals[pid] = totals.get(pid, 0) + qty
+    for pid, qty in totals.items():
+        name, available = stockable[pid]
+        if available < qty:
+            raise StockError(f"Not enough stock for {name}. Available: {available}")
+
+    product_table = Product.__table__
+    delta = case(totals, value=product_table.c.id)
+    result = db.session.execute(
+        update(product_table)
+        .where(product_table.c.id.in_(totals), product_table.c.stock_on_hand >= delta)
+        .values(stock_on_hand=product_table.c.stock_on_hand - delta)
+    )
+    if result.rowcount != len(totals):
+        # Another sale took the stock between the check above and the UPDATE
+        raise StockError("Stock levels changed while recording this sale. Please try again.")
+
+    db.session.execute(
+        insert(StockMovement),
+        [
+            {
+                "product_id": pid,
+                "movement_type": "OUT",
+                "qty": qty,
+                "reference_type": reference_type,
+                "reference_id": reference_id,
+                "notes": notes,
+            }
+            for pid, qty in lines
+        ],
+    )
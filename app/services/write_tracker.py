@@ -0,0 +1,58 @@
+"""
+Commit-time cache invalidation keyed on the tables a transaction wrote
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# (watched table names, callback) pairs registered by the caches
+_SUBSCRIBERS = []
+
+_KEY = "written_tables"
+
+
+def invalidate_on_commit(models, callback):
+    """Call ``callback()`` after any commit whose transaction wrote to one of ``models``.
+
+    Running it only once the writes are visible to other requests means a
+    concurrent request cannot re-cache the pre-commit values.
+    """
+    tables = frozenset(table.name for model in models for table in inspect(model).tables)
+    _SUBSCRIBERS.append((tables, callback))
+
+
+def _written(session):
+    return session.info.setdefault(_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_tables(session, flush_context):
+    written = _written(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        written.update(table.name for table in inspect(obj).mapper.tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_tables(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE (e.g. stock_out_many) bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _written(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    written = session.info.pop(_KEY, None)
+    if not written:
+        return
+    for tables, callback in _SUBSCRIBERS:
+        if tables & written:
+            callback()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_written_tables(session, transaction):
+    # Only when the outermost transaction ends: a SAVEPOINT rollback (e.g. the
+    # customer upsert retry) must keep what its parent already flushed
+    if transaction.parent is None:
+        session.info.pop(_KEY, None)
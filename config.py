@@ -15,6 +15,10 @@ class Config:
     
     # Database
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Room in the compiled-statement cache for every search/report filter combination
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'query_cache_size': 1200,
+    }
     
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
@@ -63,6 +67,19 @@ class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     TESTING = False
+    # Templates only change on deploy; never stat them per render
+    TEMPLATES_AUTO_RELOAD = False
+    # Keep compiled template bytecode under the instance folder across restarts
+    TEMPLATE_BYTECODE_CACHE = True
+    # Keep enough pooled connections for every server thread, check them before
+    # use and replace them before the database or a proxy drops idle ones
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,
+        'pool_recycle': 300,
+    }
     
     @staticmethod
     def init_db_uri():
@@ -0,0 +1,36 @@
+"""Add indexes for add_repair duplicate-ticket probes
+
+Revision ID: add_device_duplicate_probe_indexes
+Revises: add_repair_part_used_device_index
+Create Date: 2026-10-16 12:00:00.000000
+
+- ix_device_open_serial: partial index on (customer_id, serial_number)
+  covering only tickets that are not Completed, so the open-serial probe
+  never reads closed tickets.
+- ix_device_recent_similar: (customer_id, device_type, created_at) for the
+  7-day similar-ticket probe.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_device_duplicate_probe_indexes'
+down_revision = 'add_repair_part_used_device_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create duplicate-probe indexes on device"""
+    open_only = sa.text("status <> 'Completed'")
+    op.create_index(
+        'ix_device_open_serial', 'device', ['customer_id', 'serial_number'],
+        postgresql_where=open_only, sqlite_where=open_only,
+    )
+    op.create_index('ix_device_recent_similar', 'device', ['customer_id', 'device_type', 'created_at'])
+
+
+def downgrade():
+    """Drop duplicate-probe indexes on device"""
+    op.drop_index('ix_device_recent_similar', table_name='device')
+    op.drop_index('ix_device_open_serial', table_name='device')
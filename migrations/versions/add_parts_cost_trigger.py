@@ -0,0 +1,66 @@
+"""Maintain device.parts_cost with a trigger on repair_part_used
+
+Revision ID: add_parts_cost_trigger
+Revises: add_device_duplicate_probe_indexes
+Create Date: 2026-10-16 13:00:00.000000
+
+Any INSERT/UPDATE/DELETE on repair_part_used re-sums line_total for the
+affected device(s) into device.parts_cost, so request handlers no longer
+aggregate parts in Python.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_parts_cost_trigger'
+down_revision = 'add_device_duplicate_probe_indexes'
+branch_labels = None
+depends_on = None
+
+RESUM = (
+    "UPDATE device SET parts_cost = ("
+    "SELECT COALESCE(SUM(line_total), 0) FROM repair_part_used WHERE device_id = {row}.device_id"
+    ") WHERE id = {row}.device_id"
+)
+
+
+def upgrade():
+    """Create the parts_cost maintenance trigger(s)"""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE OR REPLACE FUNCTION repair_part_used_parts_cost() RETURNS trigger AS $$ "
+            "BEGIN "
+            "IF TG_OP IN ('UPDATE', 'DELETE') THEN " + RESUM.format(row='OLD') + "; END IF; "
+            "IF TG_OP IN ('INSERT', 'UPDATE') THEN " + RESUM.format(row='NEW') + "; END IF; "
+            "RETURN NULL; "
+            "END; $$ LANGUAGE plpgsql"
+        )
+        op.execute("DROP TRIGGER IF EXISTS trg_repair_part_used_parts_cost ON repair_part_used")
+        op.execute(
+            "CREATE TRIGGER trg_repair_part_used_parts_cost AFTER INSERT OR UPDATE OR DELETE ON repair_part_used "
+            "FOR EACH ROW EXECUTE FUNCTION repair_part_used_parts_cost()"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS trg_repair_part_used_ins AFTER INSERT ON repair_part_used "
+            f"BEGIN {RESUM.format(row='NEW')}; END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS trg_repair_part_used_upd AFTER UPDATE ON repair_part_used "
+            f"BEGIN {RESUM.format(row='OLD')}; {RESUM.format(row='NEW')}; END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS trg_repair_part_used_del AFTER DELETE ON repair_part_used "
+            f"BEGIN {RESUM.format(row='OLD')}; END"
+        )
+
+
+def downgrade():
+    """Drop the parts_cost maintenance trigger(s)"""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS trg_repair_part_used_parts_cost ON repair_part_used")
+        op.execute("DROP FUNCTION IF EXISTS repair_part_used_parts_cost()")
+    elif dialect == 'sqlite':
+        for name in ('trg_repair_part_used_ins', 'trg_repair_part_used_upd', 'trg_repair_part_used_del'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
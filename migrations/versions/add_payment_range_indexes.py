@@ -0,0 +1,36 @@
+"""Add indexes for the daily sales payment-time ranges
+
+Revision ID: add_payment_range_indexes
+Revises: add_sales_search_trgm_indexes
+Create Date: 2026-10-16 20:00:00.000000
+
+The daily sales report now filters payment timestamps with a
+[day, next day) range instead of date(col) = day, so plain column
+indexes serve it. sale_payment.paid_at already has its own index.
+
+- ix_device_deposit_paid_at / ix_device_full_payment_at: repairs paid on the day
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_payment_range_indexes'
+down_revision = 'add_sales_search_trgm_indexes'
+branch_labels = None
+depends_on = None
+
+RANGE_INDEXES = (
+    ('ix_device_deposit_paid_at', 'device', ['deposit_paid_at']),
+    ('ix_device_full_payment_at', 'device', ['full_payment_at']),
+)
+
+
+def upgrade():
+    """Create payment time range indexes"""
+    for name, table, columns in RANGE_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    """Drop payment time range indexes"""
+    for name, table, _columns in reversed(RANGE_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,26 @@
+"""Index repair_part_used.device_id
+
+Revision ID: add_repair_part_used_device_index
+Revises: add_search_trgm_indexes
+Create Date: 2026-10-16 11:00:00.000000
+
+Parts totals are now computed with SUM(line_total) WHERE device_id = ?;
+index the foreign key so the aggregate only touches the repair's rows.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_repair_part_used_device_index'
+down_revision = 'add_search_trgm_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create index on repair_part_used.device_id"""
+    op.create_index(op.f('ix_repair_part_used_device_id'), 'repair_part_used', ['device_id'], unique=False)
+
+
+def downgrade():
+    """Drop index on repair_part_used.device_id"""
+    op.drop_index(op.f('ix_repair_part_used_device_id'), table_name='repair_part_used')
@@ -0,0 +1,46 @@
+"""Add indexes for the report aggregates
+
+Revision ID: add_report_aggregate_indexes
+Revises: add_parts_cost_trigger
+Create Date: 2026-10-16 18:00:00.000000
+
+The financial summary filters payments and sales on date(col), so those
+indexes are on the same expression; actual_completion is already a date
+and is indexed as-is. Every index also carries the column being summed,
+so the aggregate can be answered from the index alone.
+
+- ix_device_received_status: repairs report (received_date range, grouped by status)
+- ix_device_completion_total: repairs invoiced over an actual_completion range
+- ix_device_payment_status: pending repairs total
+- ix_sale_created_day: sales invoiced by date(created_at)
+- ix_sale_payment_paid_day / ix_repair_payment_paid_day: revenue received by date(paid_at)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_report_aggregate_indexes'
+down_revision = 'add_parts_cost_trigger'
+branch_labels = None
+depends_on = None
+
+REPORT_INDEXES = (
+    ('ix_device_received_status', 'device', ['received_date', 'status', 'total_cost']),
+    ('ix_device_completion_total', 'device', ['actual_completion', 'total_cost']),
+    ('ix_device_payment_status', 'device', ['payment_status', 'total_cost', 'balance_due']),
+    ('ix_sale_created_day', 'sale', [sa.text('date(created_at)'), 'total']),
+    ('ix_sale_payment_paid_day', 'sale_payment', [sa.text('date(paid_at)'), 'amount']),
+    ('ix_repair_payment_paid_day', 'repair_payment', [sa.text('date(paid_at)'), 'amount']),
+)
+
+
+def upgrade():
+    """Create report aggregate indexes"""
+    for name, table, columns in REPORT_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    """Drop report aggregate indexes"""
+    for name, table, _columns in reversed(REPORT_INDEXES):
+        op.drop_index(name, table_name=table)
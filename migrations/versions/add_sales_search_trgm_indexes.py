@@ -0,0 +1,49 @@
+"""Add pg_trgm GIN indexes for the sales history search columns
+
+Revision ID: add_sales_search_trgm_indexes
+Revises: add_report_aggregate_indexes
+Create Date: 2026-10-16 19:00:00.000000
+
+sales_list() matches '%q%' with ILIKE against invoice, customer, product
+and repair columns. add_search_trgm_indexes already covers
+device.ticket_number and customer.name; these cover the rest. GIN
+gin_trgm_ops serves ILIKE directly, so the queries are unchanged. SQLite
+has no pg_trgm, so this is a no-op there.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_sales_search_trgm_indexes'
+down_revision = 'add_report_aggregate_indexes'
+branch_labels = None
+depends_on = None
+
+TRGM_INDEXES = (
+    ('ix_sale_invoice_no_trgm', 'sale', 'invoice_no'),
+    ('ix_customer_phone_trgm', 'customer', 'phone'),
+    ('ix_customer_customer_code_trgm', 'customer', 'customer_code'),
+    ('ix_product_name_trgm', 'product', 'name'),
+    ('ix_product_sku_trgm', 'product', 'sku'),
+    ('ix_device_service_type_trgm', 'device', 'service_type'),
+)
+
+
+def upgrade():
+    """Create GIN trigram indexes for the sales search columns (PostgreSQL only)"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(
+            name, table, [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade():
+    """Drop the sales search trigram indexes (PostgreSQL only)"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _column in TRGM_INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,46 @@
+"""Add pg_trgm GIN indexes for repair search columns
+
+Revision ID: add_search_trgm_indexes
+Revises: add_notes_to_repair_payment, add_revocation_to_sale_items
+Create Date: 2026-10-16 09:00:00.000000
+
+Leading-wildcard ILIKE ('%q%') cannot use a b-tree index. Trigram GIN
+indexes let PostgreSQL serve the existing repairs()/repairs_search_api()
+ILIKE predicates from an index scan. SQLite has no pg_trgm, so this is a
+no-op there.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_search_trgm_indexes'
+down_revision = ('add_notes_to_repair_payment', 'add_revocation_to_sale_items')
+branch_labels = None
+depends_on = None
+
+TRGM_INDEXES = (
+    ('ix_device_ticket_number_trgm', 'device', 'ticket_number'),
+    ('ix_device_model_trgm', 'device', 'model'),
+    ('ix_customer_name_trgm', 'customer', 'name'),
+    ('ix_customer_business_name_trgm', 'customer', 'business_name'),
+)
+
+
+def upgrade():
+    """Create the pg_trgm extension and GIN trigram indexes (PostgreSQL only)"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(
+            name, table, [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade():
+    """Drop the trigram indexes (PostgreSQL only)"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _column in TRGM_INDEXES:
+        op.drop_index(name, table_name=table)
@@ -42,3 +42,20 @@ def test_generate_customer_code_respects_highest_existing_number(app):
 
         # Highest JC-CUST is 005 -> next should be 006
         assert generate_customer_code() == 'JC-CUST-006'
+
+
+def test_generate_customer_code_orders_past_three_digits(app):
+    """JC-CUST-1000 sorts before JC-CUST-999 as a string; the generator must still pick 1001."""
+    with app.app_context():
+        from app.extensions import db
+
+        db.session.query(Customer).delete()
+        db.session.commit()
+
+        db.session.add_all([
+            Customer(customer_code='JC-CUST-999', name='A', phone='09110000021'),
+            Customer(customer_code='JC-CUST-1000', name='B', phone='09110000022'),
+        ])
+        db.session.commit()
+
+        assert generate_customer_code() == 'JC-CUST-1001'
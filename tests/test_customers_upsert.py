@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from app.extensions import db
+from app.models.customer import Customer
+from app.services.customers import get_or_create_customer_by_phone
+
+
+def _phone():
+    return "09" + str(uuid.uuid4().int)[:9]
+
+
+def test_get_or_create_inserts_new_customer(app):
+    phone = _phone()
+    with app.app_context():
+        customer, created = get_or_create_customer_by_phone(phone, name="Upsert New")
+        db.session.commit()
+
+        assert created is True
+        assert customer.id is not None
+        assert customer.customer_code.startswith("JC-CUST-")
+        assert Customer.query.filter_by(phone=phone).count() == 1
+
+
+def test_get_or_create_returns_existing_customer(app):
+    phone = _phone()
+    with app.app_context():
+        first, _ = get_or_create_customer_by_phone(phone, name="Upsert Existing")
+        db.session.commit()
+
+        again, created = get_or_create_customer_by_phone(phone, name="Ignored")
+        assert created is False
+        assert again.id == first.id
+        assert again.name == "Upsert Existing"
+
+
+def test_get_or_create_reraises_after_code_conflicts(app, monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+    import app.services.customers as customers
+    with app.app_context():
+        taken = Customer.query.filter_by(customer_code="TC-001").first().customer_code
+        monkeypatch.setattr(customers, "generate_customer_code", lambda: taken)
+        with pytest.raises(IntegrityError):
+            get_or_create_customer_by_phone(_phone(), name="Code Clash")
+        db.session.rollback()
@@ -529,3 +529,51 @@ def app_context():
     app = create_app('testing')
     with app.app_context():
         yield app
+
+
+def test_period_totals_match_itemized_methods(app):
+    """The single-query totals must agree with the row-by-row aggregation methods."""
+    import uuid
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time())
+    with app.app_context():
+        c = Customer(name="Totals Customer", phone="555-0999", customer_code=f"TOT-{uuid.uuid4().hex[:6]}")
+        db.session.add(c)
+        db.session.flush()
+
+        def sale(status, total, credit=False, payments=()):
+            s = Sale(invoice_no=f"TOT-{uuid.uuid4().hex[:8]}", customer_id=c.id, status=status,
+                     total=Decimal(total), claimed_on_credit=credit, created_at=now)
+            db.session.add(s)
+            db.session.flush()
+            for amount in payments:
+                db.session.add(SalePayment(sale_id=s.id, amount=Decimal(amount), method="Cash", paid_at=now))
+
+        sale("PAID", "1000.00", payments=["1000.00"])
+        sale("PARTIAL", "500.00")
+        sale("PARTIAL", "800.00", payments=["300.00", "0.00"])
+        sale("PARTIAL", "300.00", credit=True, payments=["50.00"])
+        sale("VOID", "250.00", payments=["250.00"])
+
+        def device(**fields):
+            d = Device(ticket_number=f"TOT-{uuid.uuid4().hex[:8]}", customer_id=c.id, device_type="Laptop",
+                       issue_description="Totals", **fields)
+            db.session.add(d)
+            db.session.flush()
+            return d
+
+        paid = device(total_cost=Decimal("400.00"), balance_due=Decimal("0.00"), payment_status="Paid", actual_completion=today)
+        db.session.add(RepairPayment(device_id=paid.id, amount=Decimal("400.00"), method="Cash", paid_at=now))
+        device(total_cost=Decimal("200.00"), balance_due=Decimal("120.00"), payment_status="Partial")
+        device(total_cost=Decimal("150.00"), balance_due=Decimal("150.00"), payment_status="Pending")
+        device(total_cost=Decimal("90.00"), balance_due=Decimal("90.00"), payment_status="Partial",
+               claimed_on_credit=True, actual_completion=today)
+        device(total_cost=Decimal("75.00"), charge_waived=True, payment_status="Paid", actual_completion=today)
+        db.session.commit()
+
+        fused = FinancialReconciliation.get_period_totals(today, today)
+        itemized = FinancialReconciliation._itemized_period_totals(today, today)
+
+        assert fused.keys() == itemized.keys()
+        for key, value in itemized.items():
+            assert fused[key] == value, key
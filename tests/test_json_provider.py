@@ -0,0 +1,33 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+
+def test_orjson_provider_matches_default_encoding(app):
+    from flask.json.provider import DefaultJSONProvider
+    payload = {'amount': Decimal('12.50'), 'day': date(2024, 1, 5), 'at': datetime(2024, 1, 5, 9, 30)}
+    with app.app_context():
+        assert json.loads(app.json.dumps(payload)) == json.loads(DefaultJSONProvider(app).dumps(payload))
+        # the stdlib encoder cannot sort mixed int/str keys; orjson stringifies them
+        assert json.loads(app.json.dumps({2: 'int key', 'a': 1})) == {'2': 'int key', 'a': 1}
+        assert app.json.loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+
+
+def test_orjson_provider_keeps_session_object_hook(app):
+    with app.app_context():
+        assert app.json.loads('{"x": 1}', object_hook=lambda d: sorted(d)) == ['x']
+
+
+def test_flashed_messages_survive_session_round_trip(app, logged_in_client):
+    with logged_in_client.session_transaction() as sess:
+        sess['_flashes'] = [('info', 'hello')]
+    with logged_in_client.session_transaction() as sess:
+        assert sess['_flashes'] == [('info', 'hello')]
+
+
+def test_jsonify_uses_orjson_provider(app):
+    from flask import jsonify
+    with app.test_request_context():
+        resp = jsonify(total=Decimal('3.10'))
+        assert resp.mimetype == 'application/json'
+        assert resp.get_json() == {'total': '3.10'}
@@ -99,3 +99,31 @@ def test_sales_list_pagination(app, logged_in_client):
     assert 'Showing' in html
     # A recently created invoice should appear on page 1
     assert created_invoices[-1] in html
+
+
+def test_repairs_list_keyset_pagination(app, logged_in_client):
+    from app.models.repair import Device
+    client = logged_in_client
+    tickets = []
+    with app.app_context():
+        # Create 55 active repairs so the list spills past one 50-row page
+        for i in range(55):
+            d = Device(ticket_number=f"KS-{uuid.uuid4().hex[:8]}", customer_id=1, device_type='laptop', issue_description=f'keyset {i}')
+            db.session.add(d)
+            tickets.append(d)
+        db.session.commit()
+        tickets = [(d.id, d.ticket_number) for d in tickets]
+
+    rv = client.get('/repairs/')
+    assert rv.status_code == 200
+    html = rv.data.decode('utf-8')
+    # Newest ticket on the first page, cursor link to the next page
+    assert tickets[-1][1] in html
+    assert 'after_id=' in html
+
+    # Seeking past the newest ticket excludes it and everything newer
+    rv2 = client.get(f'/repairs/?after_id={tickets[-1][0]}')
+    assert rv2.status_code == 200
+    html2 = rv2.data.decode('utf-8')
+    assert tickets[-1][1] not in html2
+    assert tickets[-2][1] in html2
@@ -163,4 +163,25 @@ def test_beyond_repair_behaves_like_pulled_out(app, logged_in_client):
         assert d2.charge_waived is True
         assert d2.total_cost == Decimal('0.00')
         assert d2.balance_due == Decimal('0.00')
-        assert d2.payment_status == 'Paid'
\ No newline at end of file
+        assert d2.payment_status == 'Paid'
+
+
+def test_claim_on_credit_rejects_paid_repair(app, logged_in_client):
+    client = logged_in_client
+    import uuid
+    with app.app_context():
+        d = Device(ticket_number=f"CC-{uuid.uuid4().hex[:8]}", customer_id=1, device_type='laptop', issue_description='paid', payment_status='Paid')
+        db.session.add(d)
+        db.session.commit()
+        device_id = d.id
+
+    resp = client.post(f'/repairs/{device_id}/claim-credit', follow_redirects=True)
+    assert resp.status_code == 200
+    assert b'already paid' in resp.data
+
+    with app.app_context():
+        d = db.session.get(Device, device_id)
+        assert d.claimed_on_credit is False
+        assert d.is_archived is False
+
+    assert client.post('/repairs/999999/claim-credit').status_code == 404
@@ -1,5 +1,6 @@
 import json
 from decimal import Decimal
+import uuid
 
 from app.models.repair import Device, RepairPartUsed
 from app.models.inventory import Product
@@ -328,3 +329,75 @@ def test_add_part_does_not_double_price(app, logged_in_client):
         dev = Device.query.get(device_id)
         # parts_cost should now equal sell_price * 2
         assert dev.parts_cost == product.sell_price * 2
+
+
+def test_delete_repair_restores_stock_for_all_parts(app, logged_in_client):
+    client = logged_in_client
+    with app.app_context():
+        import uuid
+        p = Product(name=f"Restore Part {uuid.uuid4().hex[:6]}", sku=f"RP-{uuid.uuid4().hex[:6]}", sell_price=Decimal('5.00'), stock_on_hand=10)
+        db.session.add(p)
+        d = Device(ticket_number=f"T-DEL-{uuid.uuid4().hex[:6]}", customer_id=1, device_type='laptop', issue_description='delete restores stock')
+        db.session.add(d)
+        db.session.commit()
+        device_id, product_id, ticket = d.id, p.id, d.ticket_number
+
+    assert add_part(client, device_id, product_id, qty=2).status_code == 200
+    assert add_part(client, device_id, product_id, qty=3).status_code == 200
+
+    with app.app_context():
+        assert Product.query.get(product_id).stock_on_hand == 5
+
+    client.post(f'/repairs/{device_id}/delete')
+
+    with app.app_context():
+        from app.models.inventory import StockMovement
+        assert Device.query.get(device_id) is None
+        assert Product.query.get(product_id).stock_on_hand == 10
+        restored = StockMovement.query.filter(
+            StockMovement.product_id == product_id,
+            StockMovement.movement_type == 'IN',
+            StockMovement.notes.contains(ticket),
+        ).all()
+        assert sorted(m.qty for m in restored) == [2, 3]
+
+
+def test_repair_detail_part_options_refresh_after_product_edit(app, logged_in_client):
+    client = logged_in_client
+    with app.app_context():
+        p = Product(name=f"Cached Part {uuid.uuid4().hex[:6]}", stock_on_hand=3, is_active=True)
+        d = Device(ticket_number=f"PC-{uuid.uuid4().hex[:8]}", customer_id=1, device_type='laptop', issue_description='cache')
+        db.session.add_all([p, d])
+        db.session.commit()
+        product_id, device_id, old_name = p.id, d.id, p.name
+
+    assert old_name in client.get(f'/repairs/{device_id}').data.decode('utf-8')
+
+    new_name = f"Renamed Part {uuid.uuid4().hex[:6]}"
+    rv = client.post(f'/inventory/products/{product_id}/edit', data={'name': new_name, 'sell_price': '5.00'})
+    assert rv.status_code == 302
+
+    html = client.get(f'/repairs/{device_id}').data.decode('utf-8')
+    assert new_name in html
+    assert old_name not in html
+
+
+def test_repair_detail_part_options_refresh_after_direct_product_commit(app, logged_in_client):
+    client = logged_in_client
+    with app.app_context():
+        d = Device(ticket_number=f"PC-{uuid.uuid4().hex[:8]}", customer_id=1, device_type='laptop', issue_description='cache')
+        db.session.add(d)
+        db.session.commit()
+        device_id = d.id
+    client.get(f'/repairs/{device_id}')  # warm the part options cache
+
+    # a Product write outside the inventory routes must still refresh the list
+    name = f"Direct Part {uuid.uuid4().hex[:6]}"
+    with app.app_context():
+        p = Product.query.filter_by(sku='DIRECT-PART').first()
+        if p is None:
+            p = Product(sku='DIRECT-PART', stock_on_hand=2, is_active=True)
+            db.session.add(p)
+        p.name = name
+        db.session.commit()
+    assert name in client.get(f'/repairs/{device_id}').data.decode('utf-8')
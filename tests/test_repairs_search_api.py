@@ -26,3 +26,45 @@ def test_repairs_search_api_needs_minimum_chars(logged_in_client):
     assert resp.status_code == 200
     data = json.loads(resp.data)
     assert data == []
+
+
+def test_repairs_search_api_cache_invalidated_on_delete(logged_in_client):
+    client = logged_in_client
+    from app.models.repair import Device
+    from app.extensions import db
+    import uuid
+    with client.application.app_context():
+        d = Device(ticket_number=f"T-CACHE-{uuid.uuid4().hex[:6]}", customer_id=1, device_type='phone', issue_description='cache test')
+        db.session.add(d)
+        db.session.commit()
+        ticket, device_id = d.ticket_number, d.id
+
+    first = json.loads(client.get(f'/repairs/search/api?q={ticket}').data)
+    assert any(item.get('ticket') == ticket for item in first)
+
+    client.post(f'/repairs/{device_id}/delete')
+    after = json.loads(client.get(f'/repairs/search/api?q={ticket}').data)
+    assert not any(item.get('ticket') == ticket for item in after)
+
+
+def test_repairs_search_api_cache_invalidated_by_any_commit(logged_in_client):
+    client = logged_in_client
+    from app.models.repair import Device
+    from app.extensions import db
+    import uuid
+    with client.application.app_context():
+        d = Device(ticket_number=f"T-STALE-{uuid.uuid4().hex[:6]}", customer_id=1, device_type='phone', brand='Old', issue_description='cache test')
+        db.session.add(d)
+        db.session.commit()
+        ticket, device_id = d.ticket_number, d.id
+
+    first = json.loads(client.get(f'/repairs/search/api?q={ticket}').data)
+    assert [item['device'] for item in first] == ['Old']
+
+    # A write outside the repairs views must still drop the cached payload
+    with client.application.app_context():
+        db.session.get(Device, device_id).brand = 'New'
+        db.session.commit()
+
+    after = json.loads(client.get(f'/repairs/search/api?q={ticket}').data)
+    assert [item['device'] for item in after] == ['New']
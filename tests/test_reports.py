@@ -1,9 +1,173 @@
+import uuid
+
+from app.models.repair import Device
+
+
 def test_repairs_report_csv(logged_in_client):
     client = logged_in_client
     resp = client.get('/reports/repairs?format=csv')
     assert resp.status_code == 200
     assert 'text/csv' in resp.headers.get('Content-Type', '')
     body = resp.get_data(as_text=True)
-    assert 'Status,Count,Total Cost' in body
+    assert resp.content_length == len(resp.get_data())
+    assert 'Status,Count,Total Cost\r\n' in body
     # Ensure our sample row exists (Received)
     assert 'Received' in body
+
+
+def test_inventory_and_financial_reports_csv(logged_in_client):
+    client = logged_in_client
+    resp = client.get('/reports/inventory?format=csv')
+    assert resp.status_code == 200
+    assert 'text/csv' in resp.headers.get('Content-Type', '')
+    assert resp.is_streamed
+    body = resp.get_data(as_text=True)
+    assert body.startswith('SKU,Name,Category,Stock,Cost,Value,Reorder To,Reorder Qty')
+
+    resp = client.get('/reports/financial?format=csv')
+    assert resp.status_code == 200
+    body = resp.get_data(as_text=True)
+    assert 'TOTAL OUTSTANDING (Current)' in body
+
+
+def test_repairs_report_cache_invalidated_by_writes(logged_in_client, app):
+    client = logged_in_client
+    # a fresh status each run, since the test database persists between runs
+    status = f'Cache Check {uuid.uuid4().hex[:6]}'
+    assert status not in client.get('/reports/repairs?format=csv').get_data(as_text=True)
+
+    from app.extensions import db
+    from app.models.customer import Customer
+    from app.services.report_cache import report_generation
+    with app.app_context():
+        c = Customer.query.filter_by(customer_code='TC-001').first()
+        d = Device.query.filter_by(ticket_number='T-CACHE').first()
+        if not d:
+            d = Device(ticket_number='T-CACHE', customer_id=c.id, device_type='laptop', issue_description='Cache test')
+            db.session.add(d)
+        d.status = status
+        generation = report_generation()
+        db.session.flush()
+        # Flushed but uncommitted: the cache is only dropped once the commit lands
+        assert report_generation() == generation
+        db.session.commit()
+        assert report_generation() != generation
+
+    # The write must not be hidden behind the cached result of the first request
+    assert status in client.get('/reports/repairs?format=csv').get_data(as_text=True)
+
+
+def test_keyset_pages_match_single_query(app):
+    from sqlalchemy import select
+    from app.blueprints.reports.routes import _keyset_pages
+    from app.extensions import db
+    from app.models.inventory import Product
+    with app.app_context():
+        for sku in ('KS-1', 'KS-2', 'KS-3'):
+            if not Product.query.filter_by(sku=sku).first():
+                # Same name on purpose: paging must fall back to the id tiebreak
+                db.session.add(Product(name='Keyset Product', sku=sku, stock_on_hand=1))
+        db.session.commit()
+
+        stmt = select(Product.id, Product.name).order_by(Product.name, Product.id)
+        expected = db.session.execute(stmt).all()
+        paged = list(_keyset_pages(stmt, (Product.name, Product.id), ('name', 'id'), page_size=2))
+        assert paged == expected
+
+
+def test_csv_field_quoting_matches_csv_module():
+    import csv
+    import io
+    from app.services.csv_export import csv_line
+    fields = ['plain', 'a,b', 'say "hi"', 'two\nlines', '', None, 12, 3.5]
+    buf = io.StringIO()
+    csv.writer(buf).writerow(fields)
+    assert csv_line(fields) == buf.getvalue()
+
+
+def test_inventory_csv_reorder_qty(logged_in_client, app):
+    from app.extensions import db
+    from app.models.inventory import Product
+    with app.app_context():
+        p = Product.query.filter_by(sku='RQ-001').first()
+        if not p:
+            p = Product(name='Reorder Product', sku='RQ-001')
+            db.session.add(p)
+        p.cost_price, p.stock_on_hand, p.reorder_to = 10, 2, 20
+        db.session.commit()
+
+    client = logged_in_client
+    body = client.get('/reports/inventory?format=csv&low=5').get_data(as_text=True)
+    assert 'RQ-001,Reorder Product,,2,10.0,20.0,20,18\r\n' in body
+    body = client.get('/reports/inventory?format=csv&low=1').get_data(as_text=True)
+    assert 'RQ-001,Reorder Product,,2,10.0,20.0,20,0\r\n' in body
+
+
+def test_inventory_json_etag(logged_in_client):
+    client = logged_in_client
+    resp = client.get('/reports/inventory.json?low=5')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['low_threshold'] == 5
+    assert any(r['sku'] == 'TP-001' for r in data['rows'])
+    etag = resp.headers['ETag']
+    assert 'max-age=30' in resp.headers['Cache-Control']
+
+    resp = client.get('/reports/inventory.json?low=5', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+
+
+def test_buffered_csv_chunks():
+    from app.services.csv_export import buffered
+    lines = [f"{i},x\r\n" for i in range(100)]
+    chunks = list(buffered(iter(lines), size=50))
+    assert ''.join(chunks) == ''.join(lines)
+    assert all(len(c) >= 50 for c in chunks[:-1])
+    assert list(buffered(iter([]))) == []
+
+
+def test_repairs_report_html_revalidates(logged_in_client):
+    client = logged_in_client
+    resp = client.get('/reports/repairs')
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+    assert resp.headers['Cache-Control'] == 'private, no-cache'
+
+    resp = client.get('/reports/repairs', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    # A different filter is a different page
+    resp = client.get('/reports/repairs?date_from=2000-01-01', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+
+
+def test_inventory_csv_gzip(logged_in_client):
+    import gzip
+    client = logged_in_client
+    plain = client.get('/reports/inventory?format=csv')
+    assert 'Content-Encoding' not in plain.headers
+
+    resp = client.get('/reports/inventory?format=csv', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    assert gzip.decompress(resp.get_data()) == plain.get_data()
+
+
+def test_reports_ignore_malformed_dates(logged_in_client):
+    client = logged_in_client
+    assert client.get('/reports/repairs?date_from=not-a-date&date_to=').status_code == 200
+    assert client.get('/reports/financial?date_from=2024-13-01&date_to=x').status_code == 200
+
+
+def test_report_cache_survives_savepoint_rollback(app):
+    from app.extensions import db
+    from app.services.report_cache import report_generation
+    with app.app_context():
+        d = Device.query.first()
+        d.technician_notes = f'savepoint {uuid.uuid4().hex[:6]}'
+        db.session.flush()
+        generation = report_generation()
+        # a rolled-back SAVEPOINT must not drop the mark left by the outer flush
+        savepoint = db.session.begin_nested()
+        savepoint.rollback()
+        db.session.commit()
+        assert report_generation() != generation
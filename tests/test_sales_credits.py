@@ -219,3 +219,29 @@ def test_sales_list_handles_device_actual_completion_date(app, logged_in_client)
     assert rv.status_code == 200
     assert ticket.encode() in rv.data
 
+
+
+def test_credits_total_includes_sale_balances(app, logged_in_client):
+    import re
+    import uuid
+    from app.models.sales import Sale, SalePayment
+    client = logged_in_client
+    with app.app_context():
+        inv = f"CR-SALE-{uuid.uuid4().hex[:6]}"
+        s = Sale(invoice_no=inv, customer_id=1, status='PARTIAL', subtotal=Decimal('90.00'), discount=Decimal('0.00'),
+                 tax=Decimal('0.00'), total=Decimal('90.00'), claimed_on_credit=True)
+        db.session.add(s)
+        db.session.flush()
+        db.session.add(SalePayment(sale_id=s.id, amount=Decimal('30.00'), method='Cash'))
+        db.session.commit()
+
+        expected = sum(float(d.balance_due or 0) for d in Device.query.filter_by(claimed_on_credit=True))
+        expected += sum(float((x.total or 0) - sum((p.amount or 0) for p in x.payments))
+                        for x in Sale.query.filter_by(claimed_on_credit=True))
+
+    rv = client.get('/sales/credits')
+    assert rv.status_code == 200
+    body = rv.get_data(as_text=True)
+    assert inv in body
+    shown = float(re.search(r'text-warning">₱([\d.]+)<', body).group(1))
+    assert shown == round(expected, 2)
@@ -157,3 +157,40 @@ def test_daily_sales_combines_sources(app, logged_in_client):
 
     # ensure at least two rows present
     assert data.count(b'<tr>') >= 2
+
+
+def test_daily_sales_partial_status_counts_earlier_payments(app, logged_in_client):
+    """A sale paid off across two days is PARTIAL on the first day and PAID on the second"""
+    from app.models.inventory import Product
+    from app.models.sales import SalePayment
+    today = datetime.now().date()
+    yesterday = today - timedelta(days=1)
+    import uuid
+    product_name = 'Split Pay Product'
+    with app.app_context():
+        p = Product.query.filter_by(sku='SPLIT-PAY').first()
+        if p is None:
+            p = Product(name=product_name, sku='SPLIT-PAY', sell_price=100, is_service=True)
+            db.session.add(p)
+            db.session.flush()
+        s = Sale(invoice_no=f"SPLIT-{today.isoformat()}-{uuid.uuid4().hex[:6]}", status='PAID', subtotal=Decimal('100.00'),
+                 discount=Decimal('0.00'), tax=Decimal('0.00'), total=Decimal('100.00'),
+                 created_at=datetime.combine(yesterday, datetime.min.time()))
+        db.session.add(s)
+        db.session.flush()
+        db.session.add(SaleItem(sale_id=s.id, product_id=p.id, qty=1, unit_price=Decimal('100.00'), line_total=Decimal('100.00')))
+        db.session.add(SalePayment(sale_id=s.id, amount=Decimal('40.00'), method='Cash',
+                                   paid_at=datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=9)))
+        db.session.add(SalePayment(sale_id=s.id, amount=Decimal('60.00'), method='Cash',
+                                   paid_at=datetime.combine(today, datetime.min.time())))
+        db.session.commit()
+
+    def statuses_on(day, amount):
+        # Earlier runs on the same database add matching rows; each must agree
+        rv = logged_in_client.get(f'/sales/daily-sales?date={day.isoformat()}&format=csv')
+        lines = [l for l in rv.data.decode('utf-8').splitlines() if product_name in l and f',{amount},' in l]
+        assert lines
+        return {l.rsplit(',', 1)[1] for l in lines}
+
+    assert statuses_on(yesterday, '40.0') == {'PARTIAL'}
+    assert statuses_on(today, '60.0') == {'PAID'}
@@ -0,0 +1,119 @@
+import json
+
+import orjson
+
+
+def test_script_json_matches_tojson_escaping(app):
+    from flask import render_template_string
+    from app.services.responses import script_json
+    payload = [{'id': 1, 'name': "</script><b>A & B's</b>", 'sell_price': 1.5, 'is_service': False}]
+    with app.test_request_context():
+        expected = render_template_string('{{ payload | tojson }}', payload=payload)
+    out = str(script_json(payload))
+    # tojson sorts keys and script_json does not, so compare values rather than text
+    assert orjson.loads(out) == orjson.loads(expected) == payload
+    for char, escape in (('<', '\\u003c'), ('>', '\\u003e'), ('&', '\\u0026'), ("'", '\\u0027')):
+        assert char not in out
+        assert escape in out
+
+
+def test_pos_page_embeds_products(logged_in_client):
+    rv = logged_in_client.get('/sales/pos')
+    assert rv.status_code == 200
+    assert b'TP-001' in rv.data
+
+
+def test_pos_rejects_malformed_cart(logged_in_client):
+    rv = logged_in_client.post('/sales/pos', data={'items': '[{not json'})
+    assert rv.status_code == 200
+    assert b'Invalid cart data' in rv.data
+
+
+def test_pos_rejects_cart_item_without_integer_qty(logged_in_client):
+    rv = logged_in_client.post('/sales/pos', data={'items': '[{"product_id": 1, "qty": "two"}]'})
+    assert rv.status_code == 200
+    assert b'Invalid cart data' in rv.data
+    rv = logged_in_client.post('/sales/pos', data={'items': '[{"qty": 1}]'})
+    assert b'Invalid cart data' in rv.data
+
+
+def test_pos_sale_with_several_products(app, logged_in_client):
+    from app.extensions import db
+    from app.models.inventory import Product
+    from app.models.sales import Sale, SaleItem
+    with app.app_context():
+        svc = Product.query.filter_by(sku='SVC-POS').first()
+        if not svc:
+            svc = Product(name='POS Service', sku='SVC-POS', sell_price=50, is_service=True)
+            db.session.add(svc)
+            db.session.commit()
+        part = Product.query.filter_by(sku='PP-POS').first()
+        if not part:
+            part = Product(name='POS Part', sku='PP-POS', sell_price=15)
+            db.session.add(part)
+        part.stock_on_hand = 10
+        db.session.commit()
+        items = [
+            {'product_id': part.id, 'qty': 2, 'price': '15.00'},
+            {'product_id': svc.id, 'qty': 1, 'price': '50.00'},
+        ]
+        last_item_id = db.session.scalar(db.select(db.func.max(SaleItem.id))) or 0
+
+    rv = logged_in_client.post('/sales/pos', data={'items': json.dumps(items), 'payment_method': 'Cash'})
+    assert rv.status_code == 302
+
+    with app.app_context():
+        sale = Sale.query.order_by(Sale.id.desc()).first()
+        assert float(sale.total) == 80.0
+        # only this sale's new rows; SQLite can reuse the id of a sale another test deleted
+        new_items = SaleItem.query.filter(SaleItem.sale_id == sale.id, SaleItem.id > last_item_id).all()
+        assert sorted(i.qty for i in new_items) == [1, 2]
+        assert Product.query.filter_by(sku='PP-POS').first().stock_on_hand == 8
+
+
+def test_pos_product_cache_refreshes_after_product_commit(app, logged_in_client):
+    from app.extensions import db
+    from app.models.inventory import Product
+    from app.services.product_cache import get_pos_products
+    with app.app_context():
+        p = Product.query.filter_by(sku='TP-001').first()
+        original = p.sell_price
+        products, _ = get_pos_products()
+        assert get_pos_products()[0] is products
+
+        p.sell_price = 99
+        db.session.commit()
+        try:
+            products, data = get_pos_products()
+            assert next(r for r in products if r['sku'] == 'TP-001')['sell_price'] == 99.0
+            assert '"sell_price":99.0' in data
+        finally:
+            p.sell_price = original
+            db.session.commit()
+
+
+def test_stock_out_many_guards_and_records_movements(app):
+    import uuid
+    import pytest
+    from app.extensions import db
+    from app.models.inventory import Product, StockMovement
+    from app.services.stock import StockError, stock_out_many
+    with app.app_context():
+        p = Product.query.filter_by(sku='SOM-001').first()
+        if not p:
+            p = Product(name='Stock Out Many', sku='SOM-001', sell_price=5)
+            db.session.add(p)
+        p.stock_on_hand = 5
+        db.session.commit()
+        # the movement count below only looks at this run's reference id
+        reference_id = uuid.uuid4().int % 10**9
+        pid = p.id
+
+        with pytest.raises(StockError, match='Not enough stock for Stock Out Many'):
+            stock_out_many([(pid, 4), (pid, 2)], reference_type='SALE', reference_id=None)
+        db.session.rollback()
+
+        stock_out_many([(pid, 3), (pid, 2)], reference_type='SALE', reference_id=reference_id, notes='som')
+        db.session.commit()
+        assert db.session.get(Product, pid).stock_on_hand == 0
+        assert StockMovement.query.filter_by(product_id=pid, reference_id=reference_id).count() == 2
@@ -105,3 +105,26 @@ def test_sales_search_text_filters_dates_and_status(app, logged_in_client):
     rv2 = client.get('/sales/list?page=2')
     assert rv2.status_code == 200
     assert b'PG-SALE' in rv2.data
+
+
+def test_sales_list_pages_do_not_overlap(app, logged_in_client):
+    import re
+    client = logged_in_client
+    tag = uuid.uuid4().hex[:6]
+    with app.app_context():
+        base = datetime.utcnow()
+        for i in range(6):
+            db.session.add(Sale(invoice_no=f"PGX-{tag}-{i}", customer_id=1, status='PAID', subtotal=Decimal('5.00'),
+                                discount=Decimal('0.00'), tax=Decimal('0.00'), total=Decimal('5.00'),
+                                created_at=base - timedelta(minutes=i)))
+        db.session.commit()
+
+    seen = []
+    for page in (1, 2, 3):
+        rv = client.get(f'/sales/list?q=PGX-{tag}&per_page=2&page={page}')
+        assert rv.status_code == 200
+        found = sorted(set(re.findall(rf'PGX-{tag}-(\d)', rv.get_data(as_text=True))))
+        assert len(found) == 2
+        seen.extend(found)
+    # newest first, every sale exactly once
+    assert seen == ['0', '1', '2', '3', '4', '5']